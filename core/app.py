@@ -39,7 +39,12 @@ from core.utilities import (
     get_user_email_info,
     get_email_and_picture_from_session,
     retire_token,
+    get_account_key,
+    get_quota_status_async,
 )
+from core.youtube_api.async_client import youtube_client
+from core.redis_storage.async_redis_db import async_redis_db
+from core.youtube_api.discovery import get_discovery_document
 from .subscriptions import subscription_router
 from .playlists import playlists_router
 
@@ -59,6 +64,17 @@ app.include_router(subscription_router)
 app.include_router(playlists_router)
 
 
+@app.on_event("startup")
+def load_youtube_discovery_document():
+    get_discovery_document()
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    await youtube_client.aclose()
+    await async_redis_db.aclose()
+
+
 SESSIONMIDDLEWARE_SECRET_KEY = os.environ.get("MIDDLEWARE_SECRET_KEY")
 GOOGLE_AUTH_REDIRECT_URI = os.environ.get("REDIRECT_URI", "http://localhost:5333/token")
 
@@ -281,6 +297,15 @@ async def review_modal(
     )
 
 
+@app.get("/quota", response_class=JSONResponse)
+async def quota_status(request: Request):
+    """Today's YouTube quota consumption, burn rate and remaining budget."""
+    email, _ = get_email_and_picture_from_session(request.session)
+    return await get_quota_status_async(
+        get_account_key(email) or request.session.get("user-id")
+    )
+
+
 @app.get("/privacy")
 async def privacy_page(request: Request):
     email, profile_picture = get_email_and_picture_from_session(request.session)
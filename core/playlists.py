@@ -6,22 +6,27 @@ from fastapi import (
     Form,
     status,
 )
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from typing import Dict, List, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 import json
 
 
 from .utilities import (
-    get_authenticated_build,
-    decode_user_token,
     make_resource_owner,
     is_token_valid,
     get_email_and_picture_from_session,
     get_all_user_playlists_from_gapi,
-    fetch_all_playlist_items_from_gapi,
-    get_gapi_build,
+    fetch_selected_playlist_items_from_gapi,
+    get_gapi_credentials,
+    get_list_cache_namespace,
+    ensure_quota_for,
+    QUOTA_COST_BY_METHOD,
     migrate_playlist_in_background,
+    make_playlist_migration_job,
+    PLAYLIST_SYNC_MODE,
+    PLAYLIST_SYNC_CREATE,
+    PLAYLIST_SYNC_INCREMENTAL,
     test_getting_db_session,
     test_getting_db_session2,
 )
@@ -29,6 +34,12 @@ from database.memory_db_models import Playlist, Owner, PlaylistItem
 from .config import templates
 
 from database.memory_db import mem_db
+from core.redis_storage.async_redis_db import async_redis_db
+from core.redis_storage.redis_db import redis_db
+from core.redis_storage.migration_progress import (
+    migration_progress_hub,
+    is_stream_id,
+)
 import core.models as models
 
 
@@ -46,9 +57,10 @@ async def fetch_all_playlists_on_authorized_account(
         raise HTTPException(
             status_code=401, detail={"msg": "Unauthorized. Ensure you are logged in"}
         )
-    decoded_token = decode_user_token(token)
-    build = get_authenticated_build(decoded_token)
-    playlists = await get_all_user_playlists_from_gapi(build)
+    credentials = get_gapi_credentials(request)
+    playlists = await get_all_user_playlists_from_gapi(
+        credentials, get_list_cache_namespace(request.session)
+    )
     email, profile_picture = get_email_and_picture_from_session(request.session)
     return templates.TemplateResponse(
         "playlists.html",
@@ -68,7 +80,7 @@ async def collate_and_store_all_selected_playlists(
     request: Request, playlists: Union[str, None] = Form(default=None)
 ):
     owner = make_resource_owner(request)
-    build = get_gapi_build(request)
+    credentials = get_gapi_credentials(request)
     json_playlists = json.loads(playlists)
     playlist_model_list = [
         models.Playlist(
@@ -81,39 +93,100 @@ async def collate_and_store_all_selected_playlists(
         )
         for resource in json_playlists
     ]
-    mem_db.store_playlists(playlist_model_list)
 
-    # Fetch all playlist_items for each playlist resource and persist in mem_db
-    for playlist_model in playlist_model_list:
-        playlist_items = await fetch_all_playlist_items_from_gapi(
-            build=build, playlist_model=playlist_model
+    # Fetch all playlist_items for each playlist resource concurrently and persist them in one write
+    playlists_items = await fetch_selected_playlist_items_from_gapi(
+        credentials=credentials,
+        playlist_models=playlist_model_list,
+        cache_namespace=get_list_cache_namespace(request.session),
+    )
+    # Playlists and their items are stored in a single session and transaction
+    with mem_db.unit_of_work():
+        mem_db.upsert_playlists(playlist_model_list)
+        mem_db.upsert_playlist_items(
+            [
+                item
+                for playlist_items in playlists_items.values()
+                for item in playlist_items
+            ]
         )
-        mem_db.store_playlist_items(playlist_items)
+    await async_redis_db.store_playlists_items_redis_db(owner.user_id, playlists_items)
     return RedirectResponse(
         url="/logout?redirect=playlists/migrated", status_code=status.HTTP_303_SEE_OTHER
     )
 
 
 @playlists_router.get("/migrated")
-async def after_signing_into_destination_acct(request: Request):
-    """Add playlist ad playlist_items to the new YouTube account"""
+async def after_signing_into_destination_acct(
+    request: Request, mode: str = PLAYLIST_SYNC_MODE
+):
+    """Add playlist ad playlist_items to the new YouTube account.
+    `mode=incremental` only appends the missing items to existing playlists of the same title."""
+    if mode not in (PLAYLIST_SYNC_CREATE, PLAYLIST_SYNC_INCREMENTAL):
+        raise HTTPException(status_code=422, detail={"msg": "Unprocessable Entity."})
     owner = make_resource_owner(request)
-    build = get_gapi_build(request)
+    get_gapi_credentials(request)
     user_id: str = owner.user_id
     if not user_id:
         raise HTTPException(
             status_code=404, detail={"msg": "Unauthorized. Ensure you are logged in"}
         )
     playlists = mem_db.get_playlists(user_id)
-    playlist_items = mem_db.get_playlist_items(user_id)
+    playlist_item_count = mem_db.count_playlist_items(user_id)
+    await ensure_quota_for(
+        (len(playlists) + playlist_item_count) * QUOTA_COST_BY_METHOD["POST"]
+    )
     email, _ = get_email_and_picture_from_session(request.session)
     # migrate playlists and send email in the background.
-    background_migrate = migrate_playlist_in_background.delay(
-        build, playlists, email, user_id, mem_db
+    job = await make_playlist_migration_job(
+        request.session.get("token"),
+        email,
+        user_id,
+        [playlist.playlist_id for playlist in playlists],
+        mode,
+    )
+    # Published before the tasks start, so the progress stream exists as soon as the job id is returned.
+    await async_redis_db.publish_migration_progress(
+        user_id,
+        job["job_id"],
+        {
+            "event": "started",
+            "playlists": len(playlists),
+            "playlist_items": playlist_item_count,
+            "mode": mode,
+        },
+    )
+    background_migrate = migrate_playlist_in_background(job)
+    return {
+        "waiting": "count-down",
+        "background": background_migrate.id,
+        "job_id": job["job_id"],
+        "progress": playlists_router.url_path_for(
+            "stream_migration_progress", job_id=job["job_id"]
+        ),
+    }
+
+
+@playlists_router.get("/migration-progress/{job_id}")
+async def stream_migration_progress(request: Request, job_id: str):
+    """Pushes the progress of a playlist migration as Server-Sent Events until it is done.
+    Reconnecting clients resume after their `Last-Event-ID`."""
+    user_id = request.session.get("user-id")
+    if not user_id:
+        raise HTTPException(
+            status_code=401, detail={"msg": "Unauthorized. Ensure you are logged in"}
+        )
+    key = redis_db.get_migration_progress_key(user_id, job_id)
+    if not await async_redis_db.has_migration_progress(key):
+        raise HTTPException(status_code=404, detail={"msg": "Migration not found."})
+    last_event_id = request.headers.get("Last-Event-ID")
+    return StreamingResponse(
+        migration_progress_hub.iter_server_sent_events(
+            key, last_event_id if is_stream_id(last_event_id) else "0-0"
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    # test the background function without celery
-    # migrate_playlist_in_background(build, playlists, email, user_id)
-    return {"waiting": "count-down", "background": background_migrate.id}
 
 
 @playlists_router.get("/test")
@@ -0,0 +1,172 @@
+"""
+This file defines the asyncio Redis client used by the FastAPI handlers, so Redis round trips made while serving a
+request never block the event loop. Celery workers keep using the sync `redis_db`. Both read and write the same keys,
+the key layouts and encodings are shared with `RedisTemp`.
+"""
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio
+
+from core import models
+from core.redis_storage.redis_db import (
+    RedisTemp,
+    TOKEN_BUCKET_SCRIPT,
+    get_connection_pool_options,
+    redis_db,
+)
+from database.memory_db import ThreadSafeSingleton
+
+
+class AsyncRedisTemp(metaclass=ThreadSafeSingleton):
+    def __init__(self):
+        AsyncRedisTemp.setup()
+
+    @classmethod
+    def setup(cls):
+        # Connections are opened lazily on the running event loop, the pool caps them at `REDIS_MAX_CONNECTIONS`.
+        cls.pool = redis.asyncio.BlockingConnectionPool(
+            **get_connection_pool_options(
+                RedisTemp.host, RedisTemp.port, RedisTemp.password
+            )
+        )
+        cls.db = redis.asyncio.Redis(connection_pool=cls.pool)
+        cls.token_bucket = cls.db.register_script(TOKEN_BUCKET_SCRIPT)
+
+    @classmethod
+    async def aclose(cls) -> None:
+        await cls.pool.disconnect()
+
+    @classmethod
+    async def store_playlists_items_redis_db(
+        cls, user_id: str, playlists_items: Dict[str, List[models.PlaylistItem]]
+    ) -> None:
+        """Stores the playlist-items of several playlists in one round trip"""
+        if not playlists_items:
+            return
+        pipeline = cls.db.pipeline()
+        redis_db.queue_playlists_items(pipeline, user_id, playlists_items)
+        await pipeline.execute()
+
+    @classmethod
+    async def get_playlist_items_redis_db(
+        cls, user_id: str, playlist_id: str
+    ) -> List[models.PlaylistItem]:
+        """Retrieves playlist item from Redis storage"""
+        chunks = await cls.db.lrange(
+            redis_db.get_playlist_items_key(user_id, playlist_id), 0, -1
+        ) or [await cls.db.hget(f"{user_id.strip()}:playlist-items", playlist_id)]
+        return [
+            playlist_item
+            for chunk in chunks
+            for playlist_item in redis_db.decode_playlist_items(chunk)
+        ]
+
+    @classmethod
+    async def get_cached_list_page(
+        cls, cache_namespace: str, request_key: str
+    ) -> Optional[dict]:
+        """Retrieves a cached YouTube list page as `{"etag": ..., "body": ...}`"""
+        value = await cls.db.get(
+            redis_db.get_list_cache_key(cache_namespace, request_key)
+        )
+        if value:
+            return json.loads(value)
+        return None
+
+    @classmethod
+    async def store_cached_list_page(
+        cls, cache_namespace: str, request_key: str, etag: str, body: dict
+    ) -> None:
+        """Caches a YouTube list page with its ETag. Pages expire on their own after `list_cache_expire_time_delta`"""
+        value = json.dumps({"etag": etag, "body": body})
+        await cls.db.set(
+            redis_db.get_list_cache_key(cache_namespace, request_key),
+            value,
+            ex=redis_db.list_cache_expire_time_delta,
+        )
+
+    @classmethod
+    async def record_quota_usage(
+        cls, day: str, minute: int, user: str, units: int
+    ) -> None:
+        """Adds `units` to the daily global, daily per-user and per-minute quota counters in one round trip"""
+        pipeline = cls.db.pipeline(transaction=False)
+        redis_db.queue_quota_usage(pipeline, day, minute, user, units)
+        await pipeline.execute()
+
+    @classmethod
+    async def get_quota_usage(
+        cls, day: str, user: str, minutes: Iterable[int]
+    ) -> tuple:
+        """Returns the units spent on `day` globally, by `user`, and in each of `minutes`"""
+        return redis_db.parse_quota_usage(
+            await cls.db.mget(redis_db.get_quota_usage_keys(day, user, minutes))
+        )
+
+    @classmethod
+    async def take_rate_limit_tokens(
+        cls, buckets: List[Tuple[str, float, float]], requested: int = 1
+    ) -> int:
+        """Atomically takes `requested` tokens from every `(key, rate, capacity)` bucket.
+        Returns 0 on success, otherwise the milliseconds to wait before retrying."""
+        keys, args = redis_db.get_rate_limit_script_args(buckets, requested)
+        return int(await cls.token_bucket(keys=keys, args=args))
+
+    @classmethod
+    async def store_job_credential(cls, token: str, email: Optional[str]) -> str:
+        """Keeps the session token of a background job in Redis and returns the opaque reference to it"""
+        pipeline = cls.db.pipeline()
+        credential_ref = redis_db.queue_job_credential(pipeline, token, email)
+        await pipeline.execute()
+        return credential_ref
+
+    @classmethod
+    async def publish_migration_progress(
+        cls, user_id: str, job_id: str, event: dict
+    ) -> None:
+        """Appends `event` to the progress stream of a migration job"""
+        pipeline = cls.db.pipeline()
+        redis_db.queue_migration_progress(
+            pipeline,
+            redis_db.get_migration_progress_key(user_id, job_id),
+            {"data": json.dumps(event)},
+        )
+        await pipeline.execute()
+
+    @classmethod
+    async def has_migration_progress(cls, key: str) -> bool:
+        return bool(await cls.db.exists(key))
+
+    @classmethod
+    async def get_migration_progress(
+        cls, key: str, after_id: str = "0-0"
+    ) -> List[Tuple[str, dict]]:
+        """Retrieves the progress entries recorded after `after_id`"""
+        entries = await cls.db.xrange(key, min=after_id)
+        return [
+            (entry_id, event)
+            for entry_id, event in redis_db.decode_migration_progress(entries)
+            if entry_id != after_id
+        ]
+
+    @classmethod
+    async def get_last_migration_progress(cls, key: str) -> Optional[Tuple[str, dict]]:
+        """Retrieves the latest progress entry of a stream, `XREVRANGE key + - COUNT 1`"""
+        entries = await cls.db.xrevrange(key, count=1)
+        decoded = redis_db.decode_migration_progress(entries)
+        return decoded[0] if decoded else None
+
+    @classmethod
+    async def read_migration_progress(
+        cls, streams: Dict[str, str], block: int
+    ) -> Dict[str, List[Tuple[str, dict]]]:
+        """Waits up to `block` milliseconds for entries newer than the given id of each stream, `XREAD BLOCK`"""
+        response = await cls.db.xread(streams, block=block)
+        return {
+            key.decode("utf-8"): redis_db.decode_migration_progress(entries)
+            for key, entries in response or []
+        }
+
+
+async_redis_db = AsyncRedisTemp()
@@ -0,0 +1,129 @@
+"""
+This file streams the progress of playlist migrations to the browser as Server-Sent Events. Celery workers append
+progress events to one Redis Stream per job, and every web process tails the streams its clients are watching with a
+single `XREAD BLOCK` loop. Watchers of a job share that loop instead of each holding a Redis connection.
+"""
+import asyncio
+import json
+import os
+import re
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from redis.exceptions import RedisError
+
+from core.logs.logger_config import logger
+from core.redis_storage.async_redis_db import async_redis_db
+
+
+load_dotenv()
+
+# Milliseconds one `XREAD` waits for new entries. Streams that start being watched are picked up by the next read.
+MIGRATION_PROGRESS_BLOCK = int(os.environ.get("MIGRATION_PROGRESS_BLOCK", 1000))
+# Seconds between keep-alive comments sent to idle watchers, so proxies do not close the connection.
+MIGRATION_PROGRESS_HEARTBEAT = float(os.environ.get("MIGRATION_PROGRESS_HEARTBEAT", 15))
+MIGRATION_DONE_EVENT = "done"
+STREAM_ID_PATTERN = re.compile(r"^\d+-\d+$")
+
+
+def parse_stream_id(entry_id: str) -> Tuple[int, int]:
+    milliseconds, sequence = entry_id.split("-")
+    return int(milliseconds), int(sequence)
+
+
+def is_stream_id(entry_id: Optional[str]) -> bool:
+    return bool(entry_id) and bool(STREAM_ID_PATTERN.match(entry_id))
+
+
+def format_server_sent_event(entry_id: str, event: dict) -> str:
+    return f"id: {entry_id}\nevent: {event.get('event', 'message')}\ndata: {json.dumps(event)}\n\n"
+
+
+class MigrationProgressHub:
+    def __init__(self) -> None:
+        self.watchers: Dict[str, Set[asyncio.Queue]] = {}
+        # Id of the last entry read from every watched stream.
+        self.positions: Dict[str, str] = {}
+        self.reader: Optional[asyncio.Task] = None
+
+    async def watch(
+        self, key: str, last_id: str = "0-0"
+    ) -> AsyncIterator[Optional[Tuple[str, dict]]]:
+        """Yields the `(entry_id, event)` entries of a progress stream recorded after `last_id`, then the new ones as
+        they are written, until the migration is done. Yields `None` when nothing happened for a heartbeat period."""
+        queue: asyncio.Queue = asyncio.Queue()
+        # Registered before reading the backlog, so no entry written in between is missed.
+        self.watchers.setdefault(key, set()).add(queue)
+        try:
+            backlog = await async_redis_db.get_migration_progress(key, last_id)
+            for entry_id, event in backlog:
+                last_id = entry_id
+                yield entry_id, event
+                if event.get("event") == MIGRATION_DONE_EVENT:
+                    return
+            # A client reconnecting after the `done` entry, e.g. an EventSource retrying once the stream closed, has
+            # nothing left to read.
+            if not backlog and await self.is_done(key):
+                return
+            self.positions.setdefault(key, last_id)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self.read())
+            while True:
+                try:
+                    entry_id, event = await asyncio.wait_for(
+                        queue.get(), MIGRATION_PROGRESS_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                # Entries of the backlog may be delivered again by the reader.
+                if parse_stream_id(entry_id) <= parse_stream_id(last_id):
+                    continue
+                last_id = entry_id
+                yield entry_id, event
+                if event.get("event") == MIGRATION_DONE_EVENT:
+                    return
+        finally:
+            self.watchers[key].discard(queue)
+            if not self.watchers[key]:
+                del self.watchers[key]
+                self.positions.pop(key, None)
+
+    @staticmethod
+    async def is_done(key: str) -> bool:
+        last_entry = await async_redis_db.get_last_migration_progress(key)
+        return (
+            last_entry is not None
+            and last_entry[1].get("event") == MIGRATION_DONE_EVENT
+        )
+
+    async def read(self) -> None:
+        """Tails every watched stream and hands the new entries to their watchers, stops once nothing is watched"""
+        while self.positions:
+            try:
+                response = await async_redis_db.read_migration_progress(
+                    dict(self.positions), MIGRATION_PROGRESS_BLOCK
+                )
+            except RedisError:
+                logger.exception("Failed to read migration progress")
+                await asyncio.sleep(MIGRATION_PROGRESS_BLOCK / 1000)
+                continue
+            for key, entries in response.items():
+                if key not in self.positions or not entries:
+                    continue
+                self.positions[key] = entries[-1][0]
+                for queue in self.watchers.get(key, ()):
+                    for entry in entries:
+                        queue.put_nowait(entry)
+
+    async def iter_server_sent_events(
+        self, key: str, last_id: str = "0-0"
+    ) -> AsyncIterator[str]:
+        async for entry in self.watch(key, last_id):
+            if entry is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield format_server_sent_event(*entry)
+
+
+migration_progress_hub = MigrationProgressHub()
@@ -0,0 +1,85 @@
+"""
+This file encodes the playlist-items cached in Redis. Items are stored column by column: fields holding the same value
+for every item (user id, originating playlist id, kind, ...) are written once, and the remaining fields as one list per
+field, so field names and ids are not repeated per item. The columns are serialized with orjson and zlib compressed
+above `PLAYLIST_ITEMS_COMPRESS_THRESHOLD` bytes.
+
+Encoded values start with a 4 byte header: `MAGIC`, the format version and the flags. Values without it are the legacy
+`json.dumps` list of `PlaylistItem.dict()` and are still decoded.
+"""
+import os
+import zlib
+from typing import List, Optional
+
+import orjson
+from dotenv import load_dotenv
+
+from core import models
+
+
+load_dotenv()
+
+MAGIC = b"PI"
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0b0000_0001
+HEADER_SIZE = len(MAGIC) + 2
+# Encoded payloads smaller than this are stored uncompressed, zlib does not pay off on a handful of items.
+PLAYLIST_ITEMS_COMPRESS_THRESHOLD = int(
+    os.environ.get("PLAYLIST_ITEMS_COMPRESS_THRESHOLD", 1024)
+)
+PLAYLIST_ITEMS_COMPRESS_LEVEL = int(os.environ.get("PLAYLIST_ITEMS_COMPRESS_LEVEL", 6))
+PLAYLIST_ITEM_FIELDS = tuple(models.PlaylistItem.__fields__)
+
+
+class PlaylistItemsDecodeError(ValueError):
+    pass
+
+
+def encode_playlist_items(playlist_items: List[models.PlaylistItem]) -> bytes:
+    rows = [
+        [getattr(item, field) for field in PLAYLIST_ITEM_FIELDS]
+        for item in playlist_items
+    ]
+    common, columns = {}, {}
+    for index, field in enumerate(PLAYLIST_ITEM_FIELDS):
+        values = [row[index] for row in rows]
+        if values and all(value == values[0] for value in values):
+            common[field] = values[0]
+        else:
+            columns[field] = values
+    payload = orjson.dumps(
+        {"count": len(playlist_items), "common": common, "columns": columns}
+    )
+    flags = 0
+    if len(payload) >= PLAYLIST_ITEMS_COMPRESS_THRESHOLD:
+        payload = zlib.compress(payload, PLAYLIST_ITEMS_COMPRESS_LEVEL)
+        flags |= FLAG_ZLIB
+    return MAGIC + bytes((FORMAT_VERSION, flags)) + payload
+
+
+def decode_playlist_items(value: Optional[bytes]) -> List[models.PlaylistItem]:
+    """Decodes both the current and the legacy format. The values were validated when they were encoded, so the
+    models are built with `construct()` instead of being validated again."""
+    if not value:
+        return []
+    if not value.startswith(MAGIC):
+        return [models.PlaylistItem.construct(**item) for item in orjson.loads(value)]
+    version, flags = value[len(MAGIC)], value[len(MAGIC) + 1]
+    if version != FORMAT_VERSION:
+        raise PlaylistItemsDecodeError(
+            f"Unsupported playlist-items format version {version}"
+        )
+    payload = value[HEADER_SIZE:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    decoded = orjson.loads(payload)
+    common, columns = decoded["common"], decoded["columns"]
+    if not columns:
+        return [
+            models.PlaylistItem.construct(**common) for _ in range(decoded["count"])
+        ]
+    fields = list(columns)
+    return [
+        models.PlaylistItem.construct(**common, **dict(zip(fields, values)))
+        for values in zip(*columns.values())
+    ]
@@ -1,14 +1,179 @@
 import redis
 import os
 import json
-from typing import List, Optional
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from uuid import uuid4
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from core import models
 from dotenv import load_dotenv
+from core.redis_storage.playlist_items_codec import (
+    encode_playlist_items,
+    decode_playlist_items,
+)
 from database.memory_db import ThreadSafeSingleton
 
 
 load_dotenv()
 
+# Connection pool settings shared by the sync (Celery) and asyncio (web) clients, each process gets its own pools.
+REDIS_MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT = float(os.environ.get("REDIS_POOL_TIMEOUT", 5))
+REDIS_SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT", 5))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.environ.get("REDIS_SOCKET_CONNECT_TIMEOUT", 5))
+# Seconds a pooled connection may sit idle before it is PINGed on checkout.
+REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL", 30))
+
+
+def get_connection_pool_options(host, port, password) -> dict:
+    return {
+        "host": host,
+        "port": port,
+        "password": password,
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "timeout": REDIS_POOL_TIMEOUT,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_SOCKET_CONNECT_TIMEOUT,
+        "socket_keepalive": True,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+        "retry_on_timeout": True,
+    }
+
+
+# Number of playlist-items per cached chunk, i.e. per Redis round trip when streaming a playlist.
+PLAYLIST_ITEMS_CHUNK_SIZE = int(os.environ.get("PLAYLIST_ITEMS_CHUNK_SIZE", 200))
+MIGRATION_STATUS_FLUSH_SIZE = int(os.environ.get("MIGRATION_STATUS_FLUSH_SIZE", 100))
+MIGRATION_STATUS_FLUSH_INTERVAL = float(
+    os.environ.get("MIGRATION_STATUS_FLUSH_INTERVAL", 2.0)
+)
+# Approximate number of entries kept per migration progress stream, older entries are trimmed.
+MIGRATION_PROGRESS_MAXLEN = int(os.environ.get("MIGRATION_PROGRESS_MAXLEN", 20_000))
+
+# Takes ARGV[1] tokens from every bucket in KEYS, refilled at ARGV[2i] tokens/s up to ARGV[2i+1] tokens.
+# Either all buckets are charged or none is. Returns 0 once charged, otherwise the milliseconds to wait before retrying.
+# Requests larger than a bucket only wait for a full bucket and leave it in debt.
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local requested = tonumber(ARGV[1])
+local wait_ms = 0
+local buckets = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local capacity = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now_ms
+    tokens = math.min(capacity, tokens + (now_ms - ts) * rate / 1000)
+    local needed = math.min(requested, capacity)
+    if tokens < needed then
+        wait_ms = math.max(wait_ms, math.ceil((needed - tokens) * 1000 / rate))
+    end
+    buckets[i] = {tokens, rate, capacity}
+end
+if wait_ms > 0 then
+    return wait_ms
+end
+for i, key in ipairs(KEYS) do
+    local tokens, rate, capacity = unpack(buckets[i])
+    redis.call('HSET', key, 'tokens', tokens - requested, 'ts', now_ms)
+    redis.call('PEXPIRE', key, math.ceil((capacity + requested) * 1000 / rate))
+end
+return 0
+"""
+
+
+class BufferedStatusWriter:
+    """Buffers migration-status `LPUSH`, progress `XADD` and quota `INCRBY` writes and sends them in one `MULTI`
+    pipeline once `max_size` writes are pending or `max_interval` seconds have passed since the last flush."""
+
+    def __init__(
+        self,
+        db: redis.Redis,
+        expire_time_delta: int,
+        max_size: int = MIGRATION_STATUS_FLUSH_SIZE,
+        max_interval: float = MIGRATION_STATUS_FLUSH_INTERVAL,
+    ) -> None:
+        self.db = db
+        self.expire_time_delta = expire_time_delta
+        self.max_size = max_size
+        self.max_interval = max_interval
+        self.pending: Dict[str, List[str]] = {}
+        self.pending_events: List[Tuple[str, dict]] = []
+        # Units by `(day, minute, user)`, increments of the same counters are summed into one.
+        self.pending_quota: Dict[Tuple[str, int, str], int] = {}
+        self.pending_count = 0
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def push(self, key: str, value: str) -> None:
+        with self.lock:
+            self.pending.setdefault(key, []).append(value)
+            self._added()
+
+    def push_event(self, key: str, fields: dict) -> None:
+        with self.lock:
+            self.pending_events.append((key, fields))
+            self._added()
+
+    def push_quota_usage(self, day: str, minute: int, user: str, units: int) -> None:
+        with self.lock:
+            counters = (day, minute, user)
+            self.pending_quota[counters] = self.pending_quota.get(counters, 0) + units
+            self._added()
+
+    def _added(self) -> None:
+        self.pending_count += 1
+        if (
+            self.pending_count >= self.max_size
+            or time.monotonic() - self.last_flush >= self.max_interval
+        ):
+            self._flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush()
+
+    def flush_with(self, queue_writes: Callable[[Any], None]) -> None:
+        """Sends the pending writes right away, together with the writes `queue_writes` queues on the same pipeline"""
+        with self.lock:
+            self._flush(queue_writes)
+
+    def _flush(self, queue_writes: Optional[Callable[[Any], None]] = None) -> None:
+        self.last_flush = time.monotonic()
+        if not self.pending_count and queue_writes is None:
+            return
+        pipeline = self.db.pipeline()
+        if queue_writes is not None:
+            queue_writes(pipeline)
+        for key, values in self.pending.items():
+            # Pushing the values in order leaves the list exactly as one `LPUSH` per value would.
+            pipeline.lpush(key, *values)
+            pipeline.expire(key, self.expire_time_delta)
+        for key, fields in self.pending_events:
+            pipeline.xadd(
+                key, fields, maxlen=MIGRATION_PROGRESS_MAXLEN, approximate=True
+            )
+        for key in {key for key, _ in self.pending_events}:
+            pipeline.expire(key, self.expire_time_delta)
+        for (day, minute, user), units in self.pending_quota.items():
+            RedisTemp.queue_quota_usage(pipeline, day, minute, user, units)
+        pipeline.execute()
+        # Only dropped once written, a failed flush is retried by the next one.
+        self.pending = {}
+        self.pending_events = []
+        self.pending_quota = {}
+        self.pending_count = 0
+
+
+# Status writer of the `RedisTemp.buffered_status_writes` block running in the current thread or task.
+current_status_writer: ContextVar[Optional[BufferedStatusWriter]] = ContextVar(
+    "status_writer", default=None
+)
+
 
 class RedisTemp(metaclass=ThreadSafeSingleton):
     def __init__(self):
@@ -16,6 +181,13 @@ class RedisTemp(metaclass=ThreadSafeSingleton):
         RedisTemp.port = os.environ.get("REDIS_STORAGE_PORT")
         RedisTemp.password = os.environ.get("REDIS_STORAGE_PASSWORD")
         RedisTemp.expire_time_delta = 100_001
+        RedisTemp.job_credential_expire_time_delta = int(
+            os.environ.get("JOB_CREDENTIAL_TTL", 24 * 60 * 60)
+        )
+        RedisTemp.quota_expire_time_delta = 2 * 24 * 60 * 60
+        RedisTemp.list_cache_expire_time_delta = int(
+            os.environ.get("GAPI_LIST_CACHE_TTL", 6 * 60 * 60)
+        )
         RedisTemp.setup()
 
     @classmethod
@@ -23,7 +195,41 @@ class RedisTemp(metaclass=ThreadSafeSingleton):
         assert (
             cls.host and cls.port and cls.password
         ), "Missing Redis Storage environment variables"
-        cls.db = redis.Redis(host=cls.host, port=cls.port, password=cls.password)
+        # Threads (Celery, FastAPI's threadpool) wait up to `REDIS_POOL_TIMEOUT` for a free connection.
+        cls.pool = redis.BlockingConnectionPool(
+            **get_connection_pool_options(cls.host, cls.port, cls.password)
+        )
+        cls.db = redis.Redis(connection_pool=cls.pool)
+        cls.token_bucket = cls.db.register_script(TOKEN_BUCKET_SCRIPT)
+
+    @classmethod
+    @contextmanager
+    def buffered_status_writes(cls) -> Iterator[BufferedStatusWriter]:
+        """Buffers the migration-status writes made inside the block and flushes them by size or interval, and
+        once more when the block exits, e.g. `with redis_db.buffered_status_writes(): ...` around a Celery task."""
+        writer = current_status_writer.get()
+        if writer is not None:
+            yield writer
+            return
+        writer = BufferedStatusWriter(cls.db, cls.expire_time_delta)
+        token = current_status_writer.set(writer)
+        try:
+            yield writer
+        finally:
+            current_status_writer.reset(token)
+            writer.flush()
+
+    @classmethod
+    def push_migrate_status(cls, key: str, value: str) -> None:
+        """Writes a migration status through the active buffered writer, or right away in a single round trip"""
+        writer = current_status_writer.get()
+        if writer is not None:
+            writer.push(key, value)
+            return
+        pipeline = cls.db.pipeline()
+        pipeline.lpush(key, value)
+        pipeline.expire(key, cls.expire_time_delta)
+        pipeline.execute()
 
     @classmethod
     def store_playlist_migrate_status(
@@ -33,14 +239,13 @@ class RedisTemp(metaclass=ThreadSafeSingleton):
         value = json.dumps(
             {playlist_id: {"status": migration_status, "title": playlist_title}}
         )
-        cls.db.lpush(key, value)
-        cls.db.expire(key, cls.expire_time_delta)
+        cls.push_migrate_status(key, value)
 
     @classmethod
-    def get_playlist_migrate_statuses(cls, user_id: str):
+    def get_playlist_migrate_statuses(cls, user_id: str) -> List[dict]:
+        """Retrieves the recorded playlist statuses, latest first"""
         key = f"{user_id.strip()}:playlist:migration-status"
-        value = cls.db.lrange(key, 0, -1)
-        return json.loads(value)
+        return [json.loads(value) for value in cls.db.lrange(key, 0, -1)]
 
     @classmethod
     def store_playlist_item_migrate_status(
@@ -63,34 +268,334 @@ class RedisTemp(metaclass=ThreadSafeSingleton):
                 }
             }
         )
-        cls.db.lpush(key, value)
-        cls.db.expire(key, cls.expire_time_delta)
+        cls.push_migrate_status(key, value)
 
     @classmethod
-    def get_playlist_migrate_statuses(cls, user_id):
+    def get_playlist_item_migrate_statuses(cls, user_id: str) -> List[dict]:
+        """Retrieves the recorded playlist-item statuses, latest first"""
         key = f"{user_id.strip()}:playlist-item:migration-status"
-        value = cls.db.lrange(key, 0, -1)
-        return json.loads(value)
+        return [json.loads(value) for value in cls.db.lrange(key, 0, -1)]
+
+    @staticmethod
+    def get_migration_progress_key(user_id: str, job_id: str) -> str:
+        return f"{user_id.strip()}:migration-progress:{job_id}"
+
+    @classmethod
+    def publish_migration_progress(cls, user_id: str, job_id: str, event: dict) -> None:
+        """Appends `event` to the progress stream of a migration job, through the active buffered writer if any"""
+        key = cls.get_migration_progress_key(user_id, job_id)
+        fields = {"data": json.dumps(event)}
+        writer = current_status_writer.get()
+        if writer is not None:
+            writer.push_event(key, fields)
+            return
+        pipeline = cls.db.pipeline()
+        cls.queue_migration_progress(pipeline, key, fields)
+        pipeline.execute()
+
+    @classmethod
+    def queue_migration_progress(cls, pipeline, key: str, fields: dict) -> None:
+        """Queues the writes of `publish_migration_progress()` on a sync or asyncio pipeline"""
+        pipeline.xadd(key, fields, maxlen=MIGRATION_PROGRESS_MAXLEN, approximate=True)
+        pipeline.expire(key, cls.expire_time_delta)
+
+    @staticmethod
+    def decode_migration_progress(entries) -> List[Tuple[str, dict]]:
+        """Decodes `XRANGE`/`XREAD` entries into `(entry_id, event)` pairs"""
+        return [
+            (entry_id.decode("utf-8"), json.loads(fields[b"data"]))
+            for entry_id, fields in entries
+        ]
 
     @classmethod
     def store_playlist_items_redis_db(
         cls, user_id: str, playlist_items: List[models.PlaylistItem], playlist_id: str
     ) -> None:
-        key = f"{user_id.strip()}:playlist-items"
-        value = {playlist_id: json.dumps([item.dict() for item in playlist_items])}
-        cls.db.hmset(key, value)
-        cls.db.expire(key, cls.expire_time_delta)
+        pipeline = cls.db.pipeline()
+        cls.queue_playlists_items(pipeline, user_id, {playlist_id: playlist_items})
+        pipeline.execute()
+
+    @classmethod
+    def store_playlists_items_redis_db(
+        cls, user_id: str, playlists_items: Dict[str, List[models.PlaylistItem]]
+    ) -> None:
+        """Stores the playlist-items of several playlists in one round trip"""
+        if not playlists_items:
+            return
+        pipeline = cls.db.pipeline()
+        cls.queue_playlists_items(pipeline, user_id, playlists_items)
+        pipeline.execute()
+
+    @classmethod
+    def queue_playlists_items(
+        cls,
+        pipeline,
+        user_id: str,
+        playlists_items: Dict[str, List[models.PlaylistItem]],
+    ) -> None:
+        """Queues the writes of `store_playlists_items_redis_db()` on a sync or asyncio pipeline.
+        Every playlist is a list of encoded chunks of `PLAYLIST_ITEMS_CHUNK_SIZE` items, readers fetch one chunk at a
+        time instead of the whole playlist."""
+        for playlist_id, playlist_items in playlists_items.items():
+            key = cls.get_playlist_items_key(user_id, playlist_id)
+            pipeline.delete(key)
+            # Drops the single-blob copy written before chunking, so it is never read in place of the new items.
+            pipeline.hdel(f"{user_id.strip()}:playlist-items", playlist_id)
+            if not playlist_items:
+                continue
+            pipeline.rpush(
+                key,
+                *[
+                    encode_playlist_items(
+                        playlist_items[start : start + PLAYLIST_ITEMS_CHUNK_SIZE]
+                    )
+                    for start in range(
+                        0, len(playlist_items), PLAYLIST_ITEMS_CHUNK_SIZE
+                    )
+                ],
+            )
+            pipeline.expire(key, cls.expire_time_delta)
+
+    @staticmethod
+    def get_playlist_items_key(user_id: str, playlist_id: str) -> str:
+        return f"{user_id.strip()}:playlist-items:{playlist_id}"
+
+    @classmethod
+    def iter_playlist_items_redis_db(
+        cls, user_id: str, playlist_id: str
+    ) -> Iterator[List[models.PlaylistItem]]:
+        """Yields the playlist-items of a playlist chunk by chunk, so only one chunk is held in memory at a time and
+        the first items can be migrated before the rest are downloaded."""
+        key = cls.get_playlist_items_key(user_id, playlist_id)
+        index = 0
+        while True:
+            chunk = cls.db.lindex(key, index)
+            if chunk is None:
+                break
+            yield cls.decode_playlist_items(chunk)
+            index += 1
+        if index == 0:
+            # Playlists cached before chunking are a single field of the `{user_id}:playlist-items` hash.
+            legacy_value = cls.db.hget(f"{user_id.strip()}:playlist-items", playlist_id)
+            if legacy_value:
+                yield cls.decode_playlist_items(legacy_value)
 
     @classmethod
     def get_playlist_items_redis_db(
         cls, user_id: str, playlist_id: str
     ) -> List[models.PlaylistItem]:
         """Retrieves playlist item from Redis storage"""
-        key = f"{user_id.strip()}:playlist-items"
-        value = cls.db.hget(key, playlist_id)
+        return [
+            playlist_item
+            for chunk in cls.iter_playlist_items_redis_db(user_id, playlist_id)
+            for playlist_item in chunk
+        ]
+
+    @staticmethod
+    def decode_playlist_items(value: Optional[bytes]) -> List[models.PlaylistItem]:
+        return decode_playlist_items(value)
+
+    @classmethod
+    def get_cached_list_page(
+        cls, cache_namespace: str, request_key: str
+    ) -> Optional[dict]:
+        """Retrieves a cached YouTube list page as `{"etag": ..., "body": ...}`"""
+        value = cls.db.get(cls.get_list_cache_key(cache_namespace, request_key))
         if value:
-            return [models.PlaylistItem(**item) for item in json.loads(value)]
-        return []
+            return json.loads(value)
+        return None
+
+    @classmethod
+    def store_cached_list_page(
+        cls, cache_namespace: str, request_key: str, etag: str, body: dict
+    ) -> None:
+        """Caches a YouTube list page with its ETag. Pages expire on their own after `list_cache_expire_time_delta`"""
+        value = json.dumps({"etag": etag, "body": body})
+        cls.db.set(
+            cls.get_list_cache_key(cache_namespace, request_key),
+            value,
+            ex=cls.list_cache_expire_time_delta,
+        )
+
+    @staticmethod
+    def get_list_cache_key(cache_namespace: str, request_key: str) -> str:
+        return f"gapi-list-cache:{cache_namespace}:{request_key}"
+
+    @classmethod
+    def record_quota_usage(cls, day: str, minute: int, user: str, units: int) -> None:
+        """Adds `units` to the daily global, daily per-user and per-minute quota counters in one round trip, or
+        through the active buffered writer"""
+        writer = current_status_writer.get()
+        if writer is not None:
+            writer.push_quota_usage(day, minute, user, units)
+            return
+        pipeline = cls.db.pipeline(transaction=False)
+        cls.queue_quota_usage(pipeline, day, minute, user, units)
+        pipeline.execute()
+
+    @classmethod
+    def queue_quota_usage(
+        cls, pipeline, day: str, minute: int, user: str, units: int
+    ) -> None:
+        """Queues the writes of `record_quota_usage()` on a sync or asyncio pipeline"""
+        for key, expire_time in (
+            (f"quota:{day}:global", cls.quota_expire_time_delta),
+            (f"quota:{day}:user:{user}", cls.quota_expire_time_delta),
+            (f"quota:minute:{minute}", 60 * 60),
+        ):
+            pipeline.incrby(key, units)
+            pipeline.expire(key, expire_time)
+
+    @classmethod
+    def get_quota_usage(cls, day: str, user: str, minutes: Iterable[int]) -> tuple:
+        """Returns the units spent on `day` globally, by `user`, and in each of `minutes`"""
+        return cls.parse_quota_usage(
+            cls.db.mget(cls.get_quota_usage_keys(day, user, minutes))
+        )
+
+    @staticmethod
+    def get_quota_usage_keys(day: str, user: str, minutes: Iterable[int]) -> List[str]:
+        return [f"quota:{day}:global", f"quota:{day}:user:{user}"] + [
+            f"quota:minute:{minute}" for minute in minutes
+        ]
+
+    @staticmethod
+    def parse_quota_usage(values: List[Optional[bytes]]) -> tuple:
+        used, user_used, *minute_usage = [int(i or 0) for i in values]
+        return used, user_used, minute_usage
+
+    @classmethod
+    def take_rate_limit_tokens(
+        cls, buckets: List[Tuple[str, float, float]], requested: int = 1
+    ) -> int:
+        """Atomically takes `requested` tokens from every `(key, rate, capacity)` bucket.
+        Returns 0 on success, otherwise the milliseconds to wait before retrying."""
+        keys, args = cls.get_rate_limit_script_args(buckets, requested)
+        return int(cls.token_bucket(keys=keys, args=args))
+
+    @staticmethod
+    def get_rate_limit_script_args(
+        buckets: List[Tuple[str, float, float]], requested: int
+    ) -> Tuple[List[str], list]:
+        keys = [f"rate-limit:{key}" for key, _, _ in buckets]
+        args = [requested]
+        for _, rate, capacity in buckets:
+            args.extend([rate, capacity])
+        return keys, args
+
+    @classmethod
+    def queue_job_credential(cls, pipeline, token: str, email: Optional[str]) -> str:
+        """Queues the write of `AsyncRedisTemp.store_job_credential()` on a pipeline, returns the credential reference"""
+        credential_ref = uuid4().hex
+        key = f"job-credential:{credential_ref}"
+        value = json.dumps({"token": token, "email": email})
+        pipeline.set(key, value, ex=cls.job_credential_expire_time_delta)
+        return credential_ref
+
+    @classmethod
+    def get_job_credential(cls, credential_ref: str) -> Optional[dict]:
+        value = cls.db.get(f"job-credential:{credential_ref}")
+        if value:
+            return json.loads(value)
+        return None
+
+    @classmethod
+    def delete_job_credential(cls, credential_ref: str) -> None:
+        cls.db.delete(f"job-credential:{credential_ref}")
+
+    @staticmethod
+    def get_checkpoint_key(user_id: str, destination_key: str, suffix: str) -> str:
+        """Checkpoints are kept per destination account, a user may migrate the same playlists to several accounts"""
+        return f"{user_id.strip()}:migration-checkpoint:{destination_key}:{suffix}"
+
+    @classmethod
+    def get_checkpoint_destination(
+        cls, user_id: str, destination_key: str, source_playlist_id: str
+    ) -> Optional[str]:
+        """Retrieves the destination playlist already created for a source playlist"""
+        key = cls.get_checkpoint_key(user_id, destination_key, "destinations")
+        value = cls.db.hget(key, source_playlist_id)
+        return value.decode("utf-8") if value else None
+
+    @classmethod
+    def store_checkpoint_destination(
+        cls,
+        user_id: str,
+        destination_key: str,
+        source_playlist_id: str,
+        destination_playlist_id: str,
+    ) -> None:
+        key = cls.get_checkpoint_key(user_id, destination_key, "destinations")
+        pipeline = cls.db.pipeline()
+        pipeline.hset(key, source_playlist_id, destination_playlist_id)
+        pipeline.expire(key, cls.expire_time_delta)
+        pipeline.execute()
+
+    @classmethod
+    def get_checkpoint_items(
+        cls,
+        user_id: str,
+        destination_key: str,
+        source_playlist_id: str,
+        destination_playlist_id: str,
+    ) -> Set[str]:
+        """Retrieves the checkpoints of the playlist-items already inserted into the destination playlist"""
+        key = cls.get_checkpoint_key(
+            user_id, destination_key, f"{source_playlist_id}:{destination_playlist_id}"
+        )
+        return {member.decode("utf-8") for member in cls.db.smembers(key)}
+
+    @classmethod
+    def add_checkpoint_item(
+        cls,
+        user_id: str,
+        destination_key: str,
+        source_playlist_id: str,
+        destination_playlist_id: str,
+        checkpoint: str,
+    ) -> None:
+        key = cls.get_checkpoint_key(
+            user_id, destination_key, f"{source_playlist_id}:{destination_playlist_id}"
+        )
+        queue_writes = partial(
+            cls.queue_checkpoint_item, key=key, checkpoint=checkpoint
+        )
+        writer = current_status_writer.get()
+        if writer is not None:
+            # Checkpoints are never delayed, the pending buffered writes go along in the same round trip.
+            writer.flush_with(queue_writes)
+            return
+        pipeline = cls.db.pipeline()
+        queue_writes(pipeline)
+        pipeline.execute()
+
+    @classmethod
+    def queue_checkpoint_item(cls, pipeline, key: str, checkpoint: str) -> None:
+        pipeline.sadd(key, checkpoint)
+        pipeline.expire(key, cls.expire_time_delta)
+
+    @classmethod
+    def delete_checkpoint_destination(
+        cls,
+        user_id: str,
+        destination_key: str,
+        source_playlist_id: str,
+        destination_playlist_id: str,
+    ) -> None:
+        """Forgets a destination playlist that no longer exists, together with the checkpoints of its items"""
+        pipeline = cls.db.pipeline()
+        pipeline.hdel(
+            cls.get_checkpoint_key(user_id, destination_key, "destinations"),
+            source_playlist_id,
+        )
+        pipeline.delete(
+            cls.get_checkpoint_key(
+                user_id,
+                destination_key,
+                f"{source_playlist_id}:{destination_playlist_id}",
+            )
+        )
+        pipeline.execute()
 
 
 redis_db = RedisTemp()
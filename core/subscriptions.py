@@ -5,6 +5,7 @@ import json
 from fastapi import APIRouter, Request, Body, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.exceptions import HTTPException
+from googleapiclient.errors import HttpError
 from typing import Union
 import urllib.parse
 import uuid
@@ -12,8 +13,9 @@ import uuid
 
 from core.utilities import (
     get_all_user_subscription,
-    get_authenticated_build,
-    decode_user_token,
+    get_gapi_build,
+    get_gapi_credentials,
+    get_list_cache_namespace,
     migrate_user_subscription,
     get_email_and_picture_from_session,
     delete_subscriptions,
@@ -48,11 +50,14 @@ async def migrate_all_subscriptions(
         """Token, can_migrate and destination_account_logged_in are all set.
         Can_migrate session var determines if the subscriptions can be added.
         It is set in the /handle-token"""
-        decoded_token = decode_user_token(token)
-        build = get_authenticated_build(decoded_token)
+        build = get_gapi_build(request)
         subscriptions = os.environ.get(request.session.get("subscription-list-id"))
-        failed_operations, successful_operations = await migrate_user_subscription(
-            build, subscriptions
+        (
+            failed_operations,
+            successful_operations,
+            skipped_operations,
+        ) = await migrate_user_subscription(
+            build, subscriptions, credentials=get_gapi_credentials(request)
         )
         total_ops = len(failed_operations) + len(successful_operations)
         email, profile_picture = get_email_and_picture_from_session(request.session)
@@ -71,6 +76,7 @@ async def migrate_all_subscriptions(
                 "number_of_failed_operations": len(failed_operations),
                 "total_operations": total_ops,
                 "successful_operations": successful_operations,
+                "skipped_operations": skipped_operations,
                 "entity": "Subscriptions",
                 "GOOGLE_API_KEY": GOOGLE_API_KEY,
             },
@@ -103,11 +109,12 @@ async def fetch_all_subscriptions(request: Request, op: str = "migrate"):
         raise HTTPException(
             status_code=401, detail={"msg": "Unauthorized. Ensure you are logged in"}
         )
-    decoded_token = decode_user_token(token)
-    build = get_authenticated_build(decoded_token)
+    credentials = get_gapi_credentials(request)
     try:
-        subscriptions = await get_all_user_subscription(build)
-    except HTTPException:
+        subscriptions = await get_all_user_subscription(
+            credentials, get_list_cache_namespace(request.session)
+        )
+    except HttpError:
         raise HTTPException(
             status_code=404, detail={"msg": "Could not fetch subscriptions."}
         )
@@ -139,8 +146,7 @@ async def migrate_all_subscriptions(
     if subscriptions.startswith("subscriptions="):
         # removes prefix("subscriptions=")
         comma_sep_subscription_string = subscriptions.replace("subscriptions=", "")
-        decoded_token = decode_user_token(token)
-    build = get_authenticated_build(decoded_token)
+    build = get_gapi_build(request)
     failed_operations, successful_operations = await delete_subscriptions(
         build, comma_sep_subscription_string
     )
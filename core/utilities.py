@@ -3,28 +3,76 @@ This file contains the helper functions for the path operations.
 """
 # FastAPI and related packages
 from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 
 # Other packages
 import re
 from typing import Any
-from datetime import datetime
+from datetime import datetime, timezone
 import os
 from pathlib import Path
 from google_auth_oauthlib.flow import Flow
 import jwt
-from typing import List
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set
+from collections import Counter
 import json
 import google.oauth2.credentials
-from googleapiclient.discovery import build, Resource
+from googleapiclient.discovery import Resource
 import httpx
+import httplib2
+import google_auth_httplib2
 import ast
+import asyncio
+import hashlib
+import threading
+import weakref
+from cachetools import TLRUCache
 from googleapiclient.errors import HttpError
+from redis.exceptions import RedisError
 from uuid import uuid4
 from pydantic import BaseModel
 import backoff
+from celery import chord
+from celery.signals import worker_process_init
 import time
 from database.memory_db import mem_db, MemDB
 from core.redis_storage.redis_db import redis_db
+from core.redis_storage.async_redis_db import async_redis_db
+from core.redis_storage.migration_progress import MIGRATION_DONE_EVENT
+from core.youtube_api.async_client import youtube_client
+from core.youtube_api.fields import (
+    SUBSCRIPTIONS_PAGE_FIELDS,
+    PLAYLISTS_PAGE_FIELDS,
+    PLAYLIST_ITEMS_FIELDS,
+    INSERTED_RESOURCE_FIELDS,
+    SUBSCRIBED_CHANNEL_IDS_FIELDS,
+    PLAYLIST_TITLES_FIELDS,
+    PLAYLIST_VIDEO_IDS_FIELDS,
+    PLAYLIST_IDS_FIELDS,
+)
+from core.youtube_api.quota import (
+    record_quota_usage,
+    set_quota_user,
+    quota_user,
+    has_quota_for_async,
+    get_quota_status_async,
+    QUOTA_COST_BY_METHOD,
+)
+from core.youtube_api.rate_limiter import (
+    acquire_rate_limit,
+    acquire_rate_limit_async,
+)
+from core.youtube_api.pagination import (
+    paginate,
+    paginate_items,
+    GOOGLE_API_MAX_RESULTS,
+)
+from core.youtube_api.discovery import (
+    build_youtube_service,
+    get_discovery_document,
+    YOUTUBE_API_SERVICE,
+    API_VERSION,
+)
 
 
 # Local imports
@@ -41,9 +89,20 @@ JWT_ALGORITHM = os.environ.get("JWT_ALGORITHM")
 
 DELIMITER = "*" * 5
 MAX_BATCH_REQUEST = 1000
-YOUTUBE_API_SERVICE = "youtube"
-API_VERSION = "v3"
-GOOGLE_API_MAX_RESULTS = 50
+SUBSCRIPTION_BATCH_SIZE = min(
+    int(os.environ.get("SUBSCRIPTION_BATCH_SIZE", 50)), MAX_BATCH_REQUEST
+)
+BATCH_REQUEST_CONCURRENCY = int(os.environ.get("BATCH_REQUEST_CONCURRENCY", 4))
+GAPI_SERVICE_CACHE_SIZE = int(os.environ.get("GAPI_SERVICE_CACHE_SIZE", 1024))
+PLAYLIST_FETCH_CONCURRENCY = int(os.environ.get("PLAYLIST_FETCH_CONCURRENCY", 5))
+playlist_fetch_semaphores: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = (
+    weakref.WeakValueDictionary()
+)
+playlist_fetch_semaphores_lock = threading.Lock()
+# `create` always creates new destination playlists, `incremental` appends the missing items to existing playlists of the same title.
+PLAYLIST_SYNC_CREATE = "create"
+PLAYLIST_SYNC_INCREMENTAL = "incremental"
+PLAYLIST_SYNC_MODE = os.environ.get("PLAYLIST_SYNC_MODE", PLAYLIST_SYNC_CREATE)
 POSSIBLE_REDIRECTS = [
     "subscriptions/migrate",
     "subscriptions/fetch",
@@ -116,19 +175,96 @@ def is_token_valid(token):
     return True
 
 
-def get_gapi_build(request: Request):
+class CachedGapiService:
+    """Authenticated credentials of a session token, the `googleapiclient` build is created on first use."""
+
+    def __init__(self, credentials: google.oauth2.credentials.Credentials):
+        self.credentials = credentials
+        self._build = None
+
+    @property
+    def build(self) -> Resource:
+        if self._build is None:
+            self._build = build_youtube_service(self.credentials)
+        return self._build
+
+    @property
+    def expires_at(self) -> float:
+        return self.credentials.expiry.replace(tzinfo=timezone.utc).timestamp()
+
+
+# Entries are evicted when the credential expires or when the least recently used entry must make room.
+gapi_service_cache = TLRUCache(
+    maxsize=GAPI_SERVICE_CACHE_SIZE,
+    ttu=lambda _key, service, _now: service.expires_at,
+    timer=time.time,
+)
+gapi_service_cache_lock = threading.Lock()
+
+
+def get_token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_cached_gapi_service(token: str) -> CachedGapiService:
+    """Returns the cached authenticated service of a session token, decoding and authenticating the token on a cache miss."""
+    key = get_token_cache_key(token)
+    with gapi_service_cache_lock:
+        service = gapi_service_cache.get(key)
+    if service is None:
+        decoded_token = decode_user_token(token)
+        service = CachedGapiService(get_authenticated_credentials(decoded_token))
+        with gapi_service_cache_lock:
+            gapi_service_cache[key] = service
+    return service
+
+
+def evict_cached_gapi_service(token: str) -> None:
+    with gapi_service_cache_lock:
+        gapi_service_cache.pop(get_token_cache_key(token), None)
+
+
+def get_account_key(email: Optional[str]) -> Optional[str]:
+    """Identifies a Google account without storing its email, unlike the session token it survives logout/login."""
+    if not email:
+        return None
+    return hashlib.sha256(email.encode("utf-8")).hexdigest()
+
+
+def get_list_cache_namespace(session: dict) -> Optional[str]:
+    """YouTube list responses are cached per Google account."""
+    email, _ = get_email_and_picture_from_session(session)
+    return get_account_key(email)
+
+
+def get_session_gapi_service(request: Request) -> CachedGapiService:
+    """Returns the cached authenticated service of the session token. The JWT is only decoded on a cache miss."""
     token = request.session.get("token", False)
-    if not is_token_valid(token):
+    if not token:
         raise HTTPException(
             status_code=401, detail={"msg": "Unauthorized. Ensure you are logged in"}
         )
+    email, _ = get_email_and_picture_from_session(request.session)
+    set_quota_user(get_account_key(email) or request.session.get("user-id"))
+    try:
+        return get_cached_gapi_service(token)
+    except HTTPException:
+        raise HTTPException(
+            status_code=401, detail={"msg": "Unauthorized. Ensure you are logged in"}
+        )
+
 
-    decoded_token = decode_user_token(token)
-    build = get_authenticated_build(decoded_token)
-    return build
+def get_gapi_build(request: Request):
+    return get_session_gapi_service(request).build
 
 
-def get_authenticated_build(decoded_token):
+def get_gapi_credentials(request: Request) -> google.oauth2.credentials.Credentials:
+    return get_session_gapi_service(request).credentials
+
+
+def get_authenticated_credentials(
+    decoded_token,
+) -> google.oauth2.credentials.Credentials:
     _credentials = models.CompleteGoogleCredential(
         **decoded_token, client_id=GOOGLE_CLIENT_ID, client_secret=GOOGLE_CLIENT_SECRET
     )
@@ -137,43 +273,26 @@ def get_authenticated_build(decoded_token):
     expiry = dict_credentials.get("expiry")
     datetime_expiry = datetime.strptime(expiry, r"%Y-%m-%dT%H:%M:%S.%fZ")
     dict_credentials["expiry"] = datetime_expiry
-    credentials = google.oauth2.credentials.Credentials(**dict_credentials)
-    _build = build(
-        serviceName=YOUTUBE_API_SERVICE,
-        version=API_VERSION,
-        credentials=credentials,
-    )
-    return _build
+    return google.oauth2.credentials.Credentials(**dict_credentials)
 
 
-async def get_all_user_subscription(build) -> dict:
+async def get_all_user_subscription(
+    credentials, cache_namespace: Optional[str] = None
+) -> dict:
     """Fetches all the subscriptions on a youtube account and returns a complex subscription resource"""
-    subscriptions: Resource = (
-        build.subscriptions()
-        .list(
+    subscriptions = [
+        subscription
+        async for subscription in paginate_items(
+            youtube_client.list_subscriptions,
+            credentials,
             part="snippet",
+            fields=SUBSCRIPTIONS_PAGE_FIELDS,
+            cache_namespace=cache_namespace,
             mine=True,
-            maxResults=GOOGLE_API_MAX_RESULTS,
             order="alphabetical",
         )
-        .execute()
-    )
-
-    next_page_token = subscriptions.get("nextPageToken", None)
-    while next_page_token is not None:
-        # Make another youtube call.
-        more_subscriptions = (
-            build.subscriptions().list(
-                part="snippet",
-                mine=True,
-                pageToken=next_page_token,
-                order="alphabetical",
-                maxResults=GOOGLE_API_MAX_RESULTS,
-            )
-        ).execute()
-        next_page_token = more_subscriptions.get("nextPageToken", None)
-        subscriptions["items"].extend(more_subscriptions["items"])
-    return subscriptions
+    ]
+    return {"items": subscriptions}
 
 
 def make_resource_owner(request: Request) -> models.Owner:
@@ -199,6 +318,7 @@ async def get_user_email_info(token):
 
 
 async def retire_token(token: str):
+    evict_cached_gapi_service(token.strip())
     credentials = decode_user_token(token.strip())
     async with httpx.AsyncClient() as client:
         await client.post(
@@ -208,90 +328,253 @@ async def retire_token(token: str):
         )
 
 
-async def delete_subscriptions(build, comma_separated_subscriptions: str):
+def format_gapi_failure_reason(exc: HttpError) -> str:
+    """Transforms reason like `subscriptionForbidden` to `Subscription Forbidden` for app rendering."""
+    reason_failed: str = exc.error_details[0]["reason"]
+    unconcan_reason: list[str] = [
+        x.title() for x in re.findall("[a-zA-Z][^A-Z]*", reason_failed)
+    ]
+    return " ".join(unconcan_reason)
+
+
+def execute_batch_chunk(build, chunk: List[tuple], http=None) -> tuple:
+    """Executes a single Google batch HTTP request made up of `(resource_id, HttpRequest)` pairs, the caller takes
+    the rate limit tokens of the chunk. Returns a list of the `resource_id`s that succeeded and a list of
+    `(resource_id, exception)` for those that failed.
+    """
+    succeeded: list[str] = []
+    failed: list[tuple] = []
+
+    def callback(request_id, response, exception):
+        resource_id = chunk[int(request_id)][0]
+        if exception is not None:
+            failed.append((resource_id, exception))
+        else:
+            succeeded.append(resource_id)
+
+    batch = build.new_batch_http_request(callback=callback)
+    # Batch request ids must be unique, the position within the chunk is used instead of the resource id.
+    for position, (_, gapi_request) in enumerate(chunk):
+        batch.add(gapi_request, request_id=str(position))
+    # One ledger write per chunk rather than per call, grouped by method since each method has its own cost.
+    for method, calls in Counter(
+        gapi_request.method for _, gapi_request in chunk
+    ).items():
+        record_quota_usage(method, calls=calls)
+    batch.execute(http=http)
+    return succeeded, failed
+
+
+def execute_gapi_request(gapi_request):
+    """Executes a `googleapiclient` request once the rate limiter allows it, charging its quota cost to the current quota user."""
+    acquire_rate_limit()
+    record_quota_usage(gapi_request.method)
+    return gapi_request.execute()
+
+
+async def ensure_quota_for(units: int) -> None:
+    """Refuses an operation up front when it would run out of daily YouTube quota halfway through."""
+    if not await has_quota_for_async(units):
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "msg": "The daily YouTube quota has been exhausted. Kindly try again tomorrow."
+            },
+        )
+
+
+def make_thread_local_http(build):
+    """httplib2 connections are not thread safe, every thread executing batches gets its own authorized transport."""
+    return google_auth_httplib2.AuthorizedHttp(
+        build._http.credentials, http=httplib2.Http()
+    )
+
+
+async def execute_batch_requests_concurrently(
+    build,
+    gapi_requests: List[tuple],
+    batch_size: int = SUBSCRIPTION_BATCH_SIZE,
+    concurrency: int = BATCH_REQUEST_CONCURRENCY,
+) -> tuple:
+    """Executes `(resource_id, HttpRequest)` pairs as Google batch HTTP requests of at most `batch_size` calls.
+    Up to `concurrency` batches run at once in the threadpool, keeping the event loop free."""
+    batch_size = max(1, min(batch_size, MAX_BATCH_REQUEST))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_chunk(chunk: List[tuple]) -> tuple:
+        async with semaphore:
+            # Waiting for tokens on the event loop instead of sleeping in a threadpool worker.
+            await acquire_rate_limit_async(len(chunk))
+            return await run_in_threadpool(
+                execute_batch_chunk,
+                build,
+                chunk,
+                make_thread_local_http(build),
+            )
+
+    results = await asyncio.gather(
+        *[
+            run_chunk(gapi_requests[start : start + batch_size])
+            for start in range(0, len(gapi_requests), batch_size)
+        ]
+    )
+    succeeded: list[str] = []
+    failed: list[tuple] = []
+    for chunk_succeeded, chunk_failed in results:
+        succeeded.extend(chunk_succeeded)
+        failed.extend(chunk_failed)
+    return succeeded, failed
+
+
+async def delete_subscriptions(
+    build,
+    comma_separated_subscriptions: str,
+    batch_size: int = SUBSCRIPTION_BATCH_SIZE,
+    concurrency: int = BATCH_REQUEST_CONCURRENCY,
+):
+    """Unsubscribes from subscription(s) using concurrent batch requests. Returns the summary of encountered errors if any and the successfully removed channel ids."""
     subscriptions = [
         {"sub_id": sub[0], "channel_id": sub[1]}
         for sub in ast.literal_eval(comma_separated_subscriptions)
     ]
-    index = 0
     all_failed_report: list[dict] = []
-    successful_operations: list[str] = []
-    while subscriptions and (len(subscriptions) > index):
-        index_sub = subscriptions[index]
-        try:
-            delete_subscription_request = build.subscriptions().delete(
-                id=index_sub.get("sub_id", "1234")
-            )
-            delete_subscription_request.execute()
-        except HttpError as exc:
-            logger.warning("Failed to delete subscription", stack_info=True)
-            # Transform reason like `subscriptionforbidden` to `Subscription Forbidden` for app rendering.
-            reason_failed: str = exc.error_details[0]["reason"]
-            unconcan_reason: list[str] = [
-                x.title() for x in re.findall("[a-zA-Z][^A-Z]*", reason_failed)
-            ]
-            failed_report = {
-                "failure_reason": " ".join(unconcan_reason),
-                "resource_id": index_sub.get("channel_id", "1234"),
-            }
-            all_failed_report.append(failed_report)
-        except Exception as exc:
-            logger.exception(
-                "Encountered unknown exception while attempting to delete subscription"
+    delete_requests = [
+        (
+            subscription.get("channel_id", "1234"),
+            build.subscriptions().delete(id=subscription.get("sub_id", "1234")),
+        )
+        for subscription in subscriptions
+    ]
+    await ensure_quota_for(len(delete_requests) * QUOTA_COST_BY_METHOD["DELETE"])
+    started_at = time.perf_counter()
+    try:
+        (
+            successful_operations,
+            failed_operations,
+        ) = await execute_batch_requests_concurrently(
+            build, delete_requests, batch_size, concurrency
+        )
+    except Exception as exc:
+        logger.exception(
+            "Encountered unknown exception while attempting to delete subscription"
+        )
+        raise HTTPException(
+            status_code=501, detail={"msg": "Failed to Unsubscribe subscription."}
+        )
+    elapsed = time.perf_counter() - started_at
+    logger.info(
+        f"Deleted {len(successful_operations)}/{len(delete_requests)} subscriptions in {elapsed:.2f}s ({len(delete_requests) / max(elapsed, 1e-6):.1f} subscriptions/s)"
+    )
+    for channel_id, exc in failed_operations:
+        if not isinstance(exc, HttpError):
+            logger.error(
+                "Encountered unknown exception while attempting to delete subscription",
+                {"channel_id": channel_id, "exception": exc},
             )
             raise HTTPException(
                 status_code=501, detail={"msg": "Failed to Unsubscribe subscription."}
             )
-        else:
-            successful_operations.append(index_sub.get("channel_id", "1234"))
-
-        index += 1
+        logger.warning("Failed to delete subscription", {"channel_id": channel_id})
+        failed_report = {
+            "failure_reason": format_gapi_failure_reason(exc),
+            "resource_id": channel_id,
+        }
+        all_failed_report.append(failed_report)
     return all_failed_report, successful_operations
 
 
+async def get_subscribed_channel_ids(credentials) -> Set[str]:
+    """Pages through the subscriptions of an account once and returns the subscribed channel ids."""
+    return {
+        subscription["snippet"]["resourceId"]["channelId"]
+        async for subscription in paginate_items(
+            youtube_client.list_subscriptions,
+            credentials,
+            part="snippet",
+            fields=SUBSCRIBED_CHANNEL_IDS_FIELDS,
+            mine=True,
+        )
+    }
+
+
 async def migrate_user_subscription(
-    build, comma_separated_subscriptions: str
-):  # -> tuple(dict, int):
-    """Migrates subscription(s) to a youtube channel. Returns the summary of encountered errors if any and the total number of subscriptions initially called."""
-    index = 0
+    build,
+    comma_separated_subscriptions: str,
+    credentials=None,
+    batch_size: int = SUBSCRIPTION_BATCH_SIZE,
+    concurrency: int = BATCH_REQUEST_CONCURRENCY,
+):  # -> tuple(dict, int, list):
+    """Migrates subscription(s) to a youtube channel. Returns the summary of encountered errors if any, the successfully added
+    channel ids and the channel ids skipped because the account already subscribes to them.
+    When `credentials` of the account are given, only channels it is not yet subscribed to are inserted.
+    Inserts are grouped into batch requests of `batch_size` subscriptions, up to `concurrency` of them run at once in
+    the threadpool so the event loop is never blocked."""
     all_failed_report: list[dict] = []
-    successful_operations: list[str] = []
-    subscriptions = comma_separated_subscriptions.split(",")
-    while subscriptions and (len(subscriptions) > index):
-        subscription_resource = {
-            "snippet": {
-                "resourceId": {
-                    "kind": "youtube#channel",
-                    "channelId": subscriptions[index],
-                },
-            }
-        }
+    subscriptions = [
+        channel_id
+        for channel_id in comma_separated_subscriptions.split(",")
+        if channel_id
+    ]
+    skipped_operations: list[str] = []
+    if credentials is not None:
         try:
-            delete_subscription_request = build.subscriptions().insert(
+            subscribed_channel_ids = await get_subscribed_channel_ids(credentials)
+        except HttpError:
+            logger.exception("Failed to fetch the destination account subscriptions")
+            subscribed_channel_ids = set()
+        skipped_operations = [
+            channel_id
+            for channel_id in subscriptions
+            if channel_id in subscribed_channel_ids
+        ]
+        subscriptions = [
+            channel_id
+            for channel_id in subscriptions
+            if channel_id not in subscribed_channel_ids
+        ]
+    # Estimated once the channels the account already follows are left out, they cost nothing.
+    await ensure_quota_for(len(subscriptions) * QUOTA_COST_BY_METHOD["POST"])
+    insert_requests = [
+        (
+            channel_id,
+            build.subscriptions().insert(
                 part="snippet",
-                body=subscription_resource,
-            )
-            delete_subscription_request.execute()
-        except HttpError as exc:
-            # Transform reason like `subscriptionforbidden` to `Subscription Forbidden` for app rendering.
-            reason_failed: str = exc.error_details[0]["reason"]
-            unconcan_reason: list[str] = [
-                x.title() for x in re.findall("[a-zA-Z][^A-Z]*", reason_failed)
-            ]
-            failed_report = {
-                "failure_reason": " ".join(unconcan_reason),
-                "resource_id": subscriptions[index],
-            }
-            all_failed_report.append(failed_report)
-        except Exception as exc:
+                fields=INSERTED_RESOURCE_FIELDS,
+                body={
+                    "snippet": {
+                        "resourceId": {
+                            "kind": "youtube#channel",
+                            "channelId": channel_id,
+                        },
+                    }
+                },
+            ),
+        )
+        for channel_id in subscriptions
+    ]
+    try:
+        (
+            successful_operations,
+            failed_operations,
+        ) = await execute_batch_requests_concurrently(
+            build, insert_requests, batch_size, concurrency
+        )
+    except Exception as exc:
+        logger.exception("Encountered unknown exception while adding subscriptions")
+        raise HTTPException(
+            status_code=501, detail={"msg": "Failed to add subscription."}
+        )
+    for channel_id, exc in failed_operations:
+        if not isinstance(exc, HttpError):
             raise HTTPException(
                 status_code=501, detail={"msg": "Failed to add subscription."}
             )
-        else:
-            successful_operations.append(subscriptions[index])
-
-        index += 1
-    return all_failed_report, successful_operations
+        failed_report = {
+            "failure_reason": format_gapi_failure_reason(exc),
+            "resource_id": channel_id,
+        }
+        all_failed_report.append(failed_report)
+    return all_failed_report, successful_operations, skipped_operations
 
 
 def start_google_flow(request: Request, redirect: str) -> Any:
@@ -307,101 +590,133 @@ def start_google_flow(request: Request, redirect: str) -> Any:
     return auth_url
 
 
-async def get_all_user_playlists_from_gapi(build) -> dict:
+async def get_all_user_playlists_from_gapi(
+    credentials, cache_namespace: Optional[str] = None
+) -> list:
     """Fetches playlist resource from YouTube Account"""
-    playlists = build.playlists().list(
-        part="snippet,status,contentDetails",
-        mine=True,
-        maxResults=GOOGLE_API_MAX_RESULTS,
-    )
     try:
-        result = playlists.execute()
+        return [
+            playlist
+            async for playlist in paginate_items(
+                youtube_client.list_playlists,
+                credentials,
+                part="snippet,status,contentDetails",
+                fields=PLAYLISTS_PAGE_FIELDS,
+                cache_namespace=cache_namespace,
+                mine=True,
+            )
+        ]
     except Exception as exc:
         logger.exception("Failed to fetch playlist from gapi")
         raise HTTPException(
             status_code=404, detail={"msg": "Unable to fetch playlists."}
         )
-    next_page_token = result.get("nextPageToken", False)
-    while next_page_token:
-        more_playlists: Resource = build.playlists().list(
-            part="snippet",
-            mine=True,
-            pageToken=next_page_token,
-            maxResults=GOOGLE_API_MAX_RESULTS,
-        )
-        result["items"].extend(more_playlists["items"])
-        next_page_token = more_playlists("nextPageToken", False)
-    return result["items"]
 
 
 def update_playlist_item_destination_ids(
     playlist_items: List[models.PlaylistItem], playlist_id: str
 ):
     for item in playlist_items:
-        item.originating_playlist_id = playlist_id
+        item.destination_playlist_id = playlist_id
     return playlist_items
 
 
-async def fetch_all_playlist_items_from_gapi(
-    build, playlist_model: models.Playlist
-) -> List[models.PlaylistItem]:
-    playlist_item_list = []
+def make_playlist_item_model(
+    playlist_item: dict, playlist_model: models.Playlist
+) -> models.PlaylistItem:
+    return models.PlaylistItem(
+        originating_playlist_id=playlist_model.playlist_id,
+        position=playlist_item["snippet"]["position"],
+        note=playlist_item.get("contentDetails", {}).get("note"),
+        user_id=playlist_model.user_id,
+        title=playlist_item["snippet"]["title"],
+        resource_id=playlist_item["snippet"]["resourceId"]["videoId"],
+        resource_kind=playlist_item["snippet"]["resourceId"]["kind"],
+    )
+
+
+async def iter_playlist_items_from_gapi(
+    credentials,
+    playlist_model: models.Playlist,
+    cache_namespace: Optional[str] = None,
+) -> AsyncIterator[List[models.PlaylistItem]]:
+    """Yields the playlist-items of a playlist one page at a time."""
     try:
-        response = (
-            build.playlistItems()
-            .list(
-                part="snippet,contentDetails",
-                maxResults=GOOGLE_API_MAX_RESULTS,
-                playlistId=playlist_model.playlist_id,
-            )
-            .execute()
-        )
-    except Exception as exc:
+        async for page in paginate(
+            youtube_client.list_playlist_items,
+            credentials,
+            part="snippet,contentDetails",
+            fields=PLAYLIST_ITEMS_FIELDS,
+            cache_namespace=cache_namespace,
+            playlistId=playlist_model.playlist_id,
+        ):
+            yield [
+                make_playlist_item_model(playlist_item, playlist_model)
+                for playlist_item in page.get("items", [])
+            ]
+    except (HttpError, httpx.HTTPError) as exc:
         logger.exception("Failed to fetch playlist-items from gapi")
         raise HTTPException(
             status_code=404, detail={"msg": "Unable to fetch playlists items."}
         )
-    next_page_token = response.get("nextPageToken", False)
-    while next_page_token:
-        try:
-
-            new_response = (
-                build.playlistItems()
-                .list(
-                    part="snippet,contentDetails",
-                    maxResults=GOOGLE_API_MAX_RESULTS,
-                    playlistId=playlist_model.playlist_id,
-                    pageToken=next_page_token,
-                )
-                .execute()
-            )
-        except Exception as exc:
-            logger.exception("Failed to fetch playlist-items from gapi")
-            raise HTTPException(
-                status_code=404, detail={"msg": "Unable to fetch playlists items."}
-            )
 
-        response["items"].extend(new_response["items"])
-        next_page_token = new_response.get("nextPageToken", False)
-
-    for playlist_item in response["items"]:
-        item = models.PlaylistItem(
-            originating_playlist_id=playlist_model.playlist_id,
-            position=playlist_item["snippet"]["position"],
-            note=playlist_item["contentDetails"].get("note", None),
-            user_id=playlist_model.user_id,
-            title=playlist_item["snippet"]["title"],
-            resource_id=playlist_item["snippet"]["resourceId"]["videoId"],
-            resource_kind=playlist_item["snippet"]["resourceId"]["kind"],
-        )
 
-        playlist_item_list.append(item)
-    redis_db.store_playlist_items_redis_db(
-        playlist_model.user_id, playlist_item_list, playlist_model.playlist_id
-    )
+async def fetch_all_playlist_items_from_gapi(
+    credentials,
+    playlist_model: models.Playlist,
+    cache_namespace: Optional[str] = None,
+) -> List[models.PlaylistItem]:
+    playlist_item_list: List[models.PlaylistItem] = []
+    async for playlist_items in iter_playlist_items_from_gapi(
+        credentials, playlist_model, cache_namespace
+    ):
+        playlist_item_list.extend(playlist_items)
     return playlist_item_list
 
 
+def get_playlist_fetch_semaphore(user: str, concurrency: int) -> asyncio.Semaphore:
+    """The semaphore limiting the concurrent playlist fetches of `user`, shared by all of their requests.
+    It is dropped once no fetch of the user holds it anymore."""
+    with playlist_fetch_semaphores_lock:
+        semaphore = playlist_fetch_semaphores.get(user)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+            playlist_fetch_semaphores[user] = semaphore
+        return semaphore
+
+
+async def fetch_selected_playlist_items_from_gapi(
+    credentials,
+    playlist_models: List[models.Playlist],
+    concurrency: int = PLAYLIST_FETCH_CONCURRENCY,
+    cache_namespace: Optional[str] = None,
+) -> Dict[str, List[models.PlaylistItem]]:
+    """Fetches the playlist-items of every playlist concurrently, at most `concurrency` playlists at a time for the
+    current quota user across all of their requests. Returns the playlist-items keyed by playlist id.
+    The first failed fetch cancels the others, so no quota is spent on a result that is thrown away."""
+    semaphore = get_playlist_fetch_semaphore(quota_user.get(), concurrency)
+
+    async def fetch(playlist_model: models.Playlist) -> List[models.PlaylistItem]:
+        async with semaphore:
+            return await fetch_all_playlist_items_from_gapi(
+                credentials, playlist_model, cache_namespace
+            )
+
+    tasks = [
+        asyncio.create_task(fetch(playlist_model)) for playlist_model in playlist_models
+    ]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return {
+        playlist_model.playlist_id: playlist_items
+        for playlist_model, playlist_items in zip(playlist_models, results)
+    }
+
+
 def backoff_playlist_gapi_handler(details: dict):
     logger.debug(
         f"Couldn't add playlist with the following details: {details.get('args')} to gapi because of the following exception:\n{details.get('exception')}"
@@ -453,8 +768,13 @@ def success_playlist_handler(details: dict):
     factor=5,
 )
 def create_playlist_gapi(
-    build, playlist_model: models.Playlist, user_id, mem_db: MemDB
-) -> List[models.PlaylistItem]:
+    build,
+    playlist_model: models.Playlist,
+    user_id,
+    mem_db: MemDB,
+    destination_key: str,
+) -> str:
+    """Creates the destination playlist and returns its id. `destination_key` identifies the destination account."""
     body = {
         "snippet": {
             "title": playlist_model.title,
@@ -464,21 +784,29 @@ def create_playlist_gapi(
         "status": {"privacyStatus": playlist_model.privacy_status},
     }
     try:
-        response = (
-            build.playlists().insert(part="id,snippet,status", body=body).execute()
+        # A resumed migration reuses the destination playlist created by the previous attempt.
+        new_id = redis_db.get_checkpoint_destination(
+            user_id, destination_key, playlist_model.playlist_id
         )
-        new_id = response["id"]
-
-        playlist_items = mem_db.get_playlist_items(user_id)
-        print("PLAYLIST ITEMS FROM MEMDB: ", playlist_items)
-        playlist_items = redis_db.get_playlist_items_redis_db(
-            user_id, playlist_model.playlist_id
-        )
-        print("PLAYLIST ITEMS FROM REDIS: ", playlist_items)
-        updated_playlist_items = update_playlist_item_destination_ids(
-            playlist_items, new_id
-        )
-        return updated_playlist_items
+        # The user may have deleted it since, its item checkpoints are then stale as well.
+        if new_id is not None and not destination_playlist_exists(build, new_id):
+            redis_db.delete_checkpoint_destination(
+                user_id, destination_key, playlist_model.playlist_id, new_id
+            )
+            new_id = None
+        if new_id is None:
+            response = execute_gapi_request(
+                build.playlists().insert(
+                    part="id,snippet,status",
+                    fields=INSERTED_RESOURCE_FIELDS,
+                    body=body,
+                )
+            )
+            new_id = response["id"]
+            redis_db.store_checkpoint_destination(
+                user_id, destination_key, playlist_model.playlist_id, new_id
+            )
+        return new_id
     except HttpError as g_exc:
         raise g_exc
     except Exception as exc:
@@ -486,6 +814,25 @@ def create_playlist_gapi(
         raise exc
 
 
+def destination_playlist_exists(build, playlist_id: str) -> bool:
+    response = execute_gapi_request(
+        build.playlists().list(part="id", id=playlist_id, fields=PLAYLIST_IDS_FIELDS)
+    )
+    return bool(response.get("items"))
+
+
+def is_playlist_not_found(exc: Exception) -> bool:
+    """Inserting into a deleted playlist cannot succeed, it is not retried."""
+    if not isinstance(exc, HttpError):
+        return False
+    reasons = {
+        detail.get("reason")
+        for detail in exc.error_details or []
+        if isinstance(detail, dict)
+    }
+    return exc.resp.status == 404 or "playlistNotFound" in reasons
+
+
 def backoff_playlist_item_gapi_handler(details: dict):
     logger.debug(
         f"Couldn't add playlist-item with the following details: {details.get('args')} to gapi because of the following exception:\n{details.get('exception')}"
@@ -529,7 +876,7 @@ def success_playlist_item_handler(details: dict):
         playlist.title,
         playlist_item.resource_id,
         playlist_item.title,
-        "Failed",
+        "Succeeded",
     )
 
 
@@ -537,6 +884,7 @@ def success_playlist_item_handler(details: dict):
     backoff.expo,
     (HttpError),
     max_tries=5,
+    giveup=is_playlist_not_found,
     jitter=backoff.full_jitter,
     on_backoff=backoff_playlist_item_gapi_handler,
     on_giveup=give_up_playlist_item_handler,
@@ -545,8 +893,12 @@ def success_playlist_item_handler(details: dict):
     factor=5,
 )
 def add_playlist_items_to_gapi(
-    build, playlist_item: models.PlaylistItem, playlist: models.Playlist
+    build,
+    playlist_item: models.PlaylistItem,
+    playlist: models.Playlist,
+    append: bool = False,
 ):
+    """Inserts a playlist-item at its original position, or at the end of the playlist when `append` is set."""
     body = {
         "snippet": {
             "playlistId": playlist_item.destination_playlist_id,
@@ -559,13 +911,17 @@ def add_playlist_items_to_gapi(
         "id": playlist_item.destination_playlist_id,
         "contentDetails": {"note": playlist_item.note},
     }
+    if append:
+        body["snippet"].pop("position")
     print("\n\n\n\nid", playlist_item.destination_playlist_id)
 
     try:
-        response = (
-            build.playlistItems()
-            .insert(part="snippet,contentDetails,id", body=body)
-            .execute()
+        response = execute_gapi_request(
+            build.playlistItems().insert(
+                part="snippet,contentDetails,id",
+                fields=INSERTED_RESOURCE_FIELDS,
+                body=body,
+            )
         )
 
     except HttpError as gexc:
@@ -591,19 +947,284 @@ def playlist_migration_mail(email, user_id, *args, **kwargs):
 #
 
 
-@celery_app.task(name="migrate-playlist", serializer="pickle")
-def migrate_playlist_in_background(build, playlist_model_list, email, user_id, db):
-    # migrate_playlist(build, playlist_model_list, user_id)
-    for playlist_model in playlist_model_list:
-        try:
-            playlist_items = create_playlist_gapi(build, playlist_model, user_id, db)
+async def make_playlist_migration_job(
+    token: str,
+    email: str,
+    user_id: str,
+    playlist_ids: List[str],
+    mode: str = PLAYLIST_SYNC_MODE,
+) -> dict:
+    """Describes a playlist migration with JSON-serializable values only. The session token and email are kept in
+    Redis, the job only carries an opaque reference to them."""
+    return {
+        "job_id": uuid4().hex,
+        "user_id": user_id,
+        "quota_user": get_account_key(email) or user_id,
+        "playlist_ids": playlist_ids,
+        "mode": mode,
+        "credential_ref": await async_redis_db.store_job_credential(token, email),
+    }
+
+
+def get_job_gapi_build(job: dict):
+    """Rebuilds the authenticated `googleapiclient` build of a job worker-side."""
+    job_credential = redis_db.get_job_credential(job["credential_ref"])
+    if job_credential is None:
+        raise ValueError(f"Credential of job {job['credential_ref']} has expired")
+    return get_cached_gapi_service(job_credential["token"]).build
+
+
+def iter_gapi_list_pages(collection, **params) -> Iterator[dict]:
+    """Yields every page of a `googleapiclient` list call, e.g. `iter_gapi_list_pages(build.playlists(), mine=True)`."""
+    gapi_request = collection.list(maxResults=GOOGLE_API_MAX_RESULTS, **params)
+    while gapi_request is not None:
+        response = execute_gapi_request(gapi_request)
+        yield response
+        gapi_request = collection.list_next(gapi_request, response)
+
+
+def match_destination_playlist(
+    build, playlist_model: models.Playlist, user_id: str, destination_key: str
+) -> Optional[str]:
+    """Finds the playlist of the destination account with the same title as the source playlist and checkpoints it as
+    the destination, so `create_playlist_gapi()` reuses it instead of creating a new playlist."""
+    destination_playlist_id = redis_db.get_checkpoint_destination(
+        user_id, destination_key, playlist_model.playlist_id
+    )
+    if destination_playlist_id is not None:
+        return destination_playlist_id
+    title = playlist_model.title.strip().casefold()
+    for page in iter_gapi_list_pages(
+        build.playlists(), part="snippet", fields=PLAYLIST_TITLES_FIELDS, mine=True
+    ):
+        for playlist in page.get("items", []):
+            if playlist["snippet"]["title"].strip().casefold() == title:
+                redis_db.store_checkpoint_destination(
+                    user_id, destination_key, playlist_model.playlist_id, playlist["id"]
+                )
+                return playlist["id"]
+    return None
+
+
+def get_playlist_video_ids(build, playlist_id: str) -> Counter:
+    """Counts the videos currently in a playlist, a video may be in a playlist more than once."""
+    return Counter(
+        playlist_item["snippet"]["resourceId"]["videoId"]
+        for page in iter_gapi_list_pages(
+            build.playlistItems(),
+            part="snippet",
+            fields=PLAYLIST_VIDEO_IDS_FIELDS,
+            playlistId=playlist_id,
+        )
+        for playlist_item in page.get("items", [])
+    )
+
+
+def iter_source_playlist_items(
+    user_id: str, playlist_id: str
+) -> Iterator[List[models.PlaylistItem]]:
+    """Yields the playlist-items to migrate chunk by chunk from Redis, or page by page from MemDB once the Redis copy
+    has expired."""
+    from_redis = False
+    for chunk in redis_db.iter_playlist_items_redis_db(user_id, playlist_id):
+        from_redis = True
+        yield chunk
+    if not from_redis:
+        yield from mem_db.iter_playlist_items(user_id, playlist_id)
+
+
+def get_playlist_item_checkpoint(playlist_item: models.PlaylistItem) -> str:
+    """A playlist may hold the same video more than once, its position tells the copies apart."""
+    return f"{playlist_item.resource_id}:{playlist_item.position}"
+
+
+@worker_process_init.connect
+def dispose_inherited_mem_db_connections(**kwargs) -> None:
+    """Prefork children inherit the pooled connections the parent opened at import. They are dropped without being
+    closed, the parent still owns them, and every child opens its own."""
+    mem_db.get_engine().dispose(close=False)
+
+
+@celery_app.task(name="migrate-single-playlist", serializer="json")
+def migrate_single_playlist_in_background(job: dict, playlist_id: str):
+    """Creates one playlist on the destination account and adds its items. Failures are reported instead of raised so
+    the remaining playlists of the migration are not affected."""
+    summary = make_playlist_summary(playlist_id, "Failed")
+    # Anything raised here would skip the chord body, the completion step of the whole migration.
+    try:
+        # Item statuses and quota usage are written to Redis in batches instead of per item, the rest when the task ends.
+        with redis_db.buffered_status_writes():
+            summary = migrate_single_playlist(job, playlist_id)
+    except Exception:
+        logger.exception("Failed to migrate playlist", {"playlist_id": playlist_id})
+    return summary
+
+
+def make_playlist_summary(playlist_id: str, migration_status: str) -> dict:
+    return {
+        "playlist_id": playlist_id,
+        "title": None,
+        "status": migration_status,
+        "failed_items": 0,
+        "skipped_items": 0,
+    }
+
+
+def migrate_single_playlist(job: dict, playlist_id: str) -> dict:
+    user_id = job["user_id"]
+    # The quota user is the destination account, its checkpoints are kept apart from other accounts'.
+    destination_key = job["quota_user"]
+    set_quota_user(destination_key)
+    summary = make_playlist_summary(playlist_id, "Succeeded")
+    incremental = job.get("mode") == PLAYLIST_SYNC_INCREMENTAL
+    # A playlist that cannot be migrated is reported as failed, it must not fail the chord and the other playlists.
+    try:
+        playlist_model = mem_db.get_playlist(playlist_id, user_id)
+        summary["title"] = playlist_model.title
+        build = get_job_gapi_build(job)
+        if incremental:
+            match_destination_playlist(build, playlist_model, user_id, destination_key)
+        destination_playlist_id = create_playlist_gapi(
+            build, playlist_model, user_id, mem_db, destination_key
+        )
+        completed_items = redis_db.get_checkpoint_items(
+            user_id, destination_key, playlist_id, destination_playlist_id
+        )
+        # Items already in the destination playlist count as completed, only the missing ones are inserted.
+        destination_video_ids = (
+            get_playlist_video_ids(build, destination_playlist_id)
+            if incremental
+            else Counter()
+        )
+        # Items are streamed chunk by chunk, insertion starts before the whole playlist is loaded.
+        for playlist_items in iter_source_playlist_items(user_id, playlist_id):
+            update_playlist_item_destination_ids(
+                playlist_items, destination_playlist_id
+            )
             for playlist_item in playlist_items:
-                add_playlist_items_to_gapi(build, playlist_item, playlist_model)
+                checkpoint = get_playlist_item_checkpoint(playlist_item)
+                if destination_video_ids[playlist_item.resource_id] > 0:
+                    destination_video_ids[playlist_item.resource_id] -= 1
+                    completed_items.add(checkpoint)
+                if checkpoint in completed_items:
+                    summary["skipped_items"] += 1
+                    publish_playlist_item_progress(job, playlist_item, "Skipped")
+                    continue
+                try:
+                    add_playlist_items_to_gapi(
+                        build, playlist_item, playlist_model, append=incremental
+                    )
+                except Exception as exc:
+                    summary["failed_items"] += 1
+                    publish_playlist_item_progress(job, playlist_item, "Failed")
+                    if is_playlist_not_found(exc):
+                        # Deleted during the migration, the next attempt creates it again.
+                        redis_db.delete_checkpoint_destination(
+                            user_id,
+                            destination_key,
+                            playlist_id,
+                            destination_playlist_id,
+                        )
+                        raise
+                    continue
+                try:
+                    redis_db.add_checkpoint_item(
+                        user_id,
+                        destination_key,
+                        playlist_id,
+                        destination_playlist_id,
+                        checkpoint,
+                    )
+                except RedisError:
+                    # The item was inserted, a resumed migration may only insert it again.
+                    logger.exception(
+                        "Failed to checkpoint playlist-item",
+                        {"playlist_id": playlist_id, "checkpoint": checkpoint},
+                    )
+                publish_playlist_item_progress(job, playlist_item, "Succeeded")
+    except Exception:
+        logger.exception("Failed to migrate playlist", {"playlist_id": playlist_id})
+        summary["status"] = "Failed"
+    publish_playlist_progress(job, summary)
+    return summary
+
+
+def publish_playlist_item_progress(
+    job: dict, playlist_item: models.PlaylistItem, migration_status: str
+) -> None:
+    redis_db.publish_migration_progress(
+        job["user_id"],
+        job["job_id"],
+        {
+            "event": "playlist-item",
+            "playlist_id": playlist_item.originating_playlist_id,
+            "resource_id": playlist_item.resource_id,
+            "title": playlist_item.title,
+            "status": migration_status,
+        },
+    )
+
+
+def publish_playlist_progress(job: dict, summary: dict) -> None:
+    redis_db.publish_migration_progress(
+        job["user_id"], job["job_id"], {"event": "playlist", **summary}
+    )
+
+
+@celery_app.task(name="finish-playlist-migration", serializer="json")
+def finish_playlist_migration(playlist_summaries: List[dict], job: dict):
+    """Runs once every playlist of a migration has been processed."""
+    job_credential = redis_db.get_job_credential(job["credential_ref"]) or {}
+    redis_db.delete_job_credential(job["credential_ref"])
+    redis_db.publish_migration_progress(
+        job["user_id"],
+        job["job_id"],
+        {
+            "event": MIGRATION_DONE_EVENT,
+            "playlists": len(playlist_summaries),
+            "failed_playlists": sum(
+                summary["status"] == "Failed" for summary in playlist_summaries
+            ),
+            "failed_items": sum(
+                summary["failed_items"] for summary in playlist_summaries
+            ),
+            "skipped_items": sum(
+                summary["skipped_items"] for summary in playlist_summaries
+            ),
+        },
+    )
+    return playlist_migration_mail(
+        job_credential.get("email"), job["user_id"], playlist_summaries
+    )
+
+
+@celery_app.task(name="fail-playlist-migration", serializer="json")
+def fail_playlist_migration(request, exc, traceback, job: dict):
+    """Chord error callback, ends a migration whose playlist tasks did not all complete so watchers of its progress
+    still get a `done` event."""
+    logger.error(
+        "Playlist migration failed", {"job_id": job["job_id"], "exception": repr(exc)}
+    )
+    job_credential = redis_db.get_job_credential(job["credential_ref"]) or {}
+    redis_db.delete_job_credential(job["credential_ref"])
+    redis_db.publish_migration_progress(
+        job["user_id"],
+        job["job_id"],
+        {
+            "event": MIGRATION_DONE_EVENT,
+            "status": "Failed",
+            "playlists": len(job["playlist_ids"]),
+        },
+    )
+    return playlist_migration_mail(job_credential.get("email"), job["user_id"], [])
+
 
-        except Exception as e:
-            raise e
-    email_status = playlist_migration_mail(email, user_id)
-    return email_status
+def migrate_playlist_in_background(job: dict):
+    """Fans the migration out into one Celery task per playlist, followed by a chord that sends the completion mail."""
+    return chord(
+        migrate_single_playlist_in_background.s(job, playlist_id)
+        for playlist_id in job["playlist_ids"]
+    )(finish_playlist_migration.s(job).on_error(fail_playlist_migration.s(job)))
 
 
 @celery_app.task(name="test-creating-db-session", serializer="pickle")
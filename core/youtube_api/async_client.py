@@ -0,0 +1,200 @@
+"""
+This file defines an asyncio YouTube Data API client. All calls share one pooled `httpx.AsyncClient`
+so keep-alive connections are reused across users and requests never block the event loop.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from typing import Optional
+
+import google.auth.transport.requests
+import google.oauth2.credentials
+import httplib2
+import httpx
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from googleapiclient.errors import HttpError
+from redis.exceptions import RedisError
+
+from core.logs.logger_config import logger
+from core.redis_storage.async_redis_db import async_redis_db
+from core.youtube_api.quota import record_quota_usage_async
+from core.youtube_api.rate_limiter import acquire_rate_limit_async
+from database.memory_db import ThreadSafeSingleton
+
+
+load_dotenv()
+
+YOUTUBE_API_BASE_URL = "https://www.googleapis.com/youtube/v3/"
+
+
+def make_list_cache_request_key(resource: str, params: dict) -> str:
+    """Identifies a list page by its resource and query parameters"""
+    query = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(f"{resource}?{query}".encode("utf-8")).hexdigest()
+
+
+class AsyncYouTubeClient(metaclass=ThreadSafeSingleton):
+    def __init__(self):
+        AsyncYouTubeClient.max_connections = int(
+            os.environ.get("YOUTUBE_CLIENT_MAX_CONNECTIONS", 100)
+        )
+        AsyncYouTubeClient.max_keepalive_connections = int(
+            os.environ.get("YOUTUBE_CLIENT_MAX_KEEPALIVE_CONNECTIONS", 20)
+        )
+        AsyncYouTubeClient.max_concurrent_requests = int(
+            os.environ.get("YOUTUBE_CLIENT_MAX_CONCURRENT_REQUESTS", 50)
+        )
+        AsyncYouTubeClient.timeout = float(os.environ.get("YOUTUBE_CLIENT_TIMEOUT", 30))
+        AsyncYouTubeClient.setup()
+
+    @classmethod
+    def setup(cls):
+        cls.client = httpx.AsyncClient(
+            base_url=YOUTUBE_API_BASE_URL,
+            limits=httpx.Limits(
+                max_connections=cls.max_connections,
+                max_keepalive_connections=cls.max_keepalive_connections,
+            ),
+            timeout=cls.timeout,
+        )
+        cls.semaphore = asyncio.Semaphore(cls.max_concurrent_requests)
+
+    @classmethod
+    async def aclose(cls) -> None:
+        await cls.client.aclose()
+
+    @classmethod
+    async def get_access_token(
+        cls, credentials: google.oauth2.credentials.Credentials
+    ) -> str:
+        """Returns a valid access token, refreshing the credentials in the threadpool when expired."""
+        if not credentials.valid:
+            await run_in_threadpool(
+                credentials.refresh, google.auth.transport.requests.Request()
+            )
+        return credentials.token
+
+    @classmethod
+    async def request(
+        cls,
+        credentials: google.oauth2.credentials.Credentials,
+        method: str,
+        resource: str,
+        params: Optional[dict] = None,
+        body: Optional[dict] = None,
+        cache_namespace: Optional[str] = None,
+    ) -> dict:
+        """Makes a YouTube Data API call. Failed calls raise `HttpError` exactly like `googleapiclient` does.
+        When `cache_namespace` is given the response is cached in Redis by its ETag and replayed on a `304 Not Modified`.
+        """
+        params = {
+            key: value for key, value in (params or {}).items() if value is not None
+        }
+        headers = {"Authorization": f"Bearer {await cls.get_access_token(credentials)}"}
+        cached_page = None
+        if cache_namespace is not None:
+            request_key = make_list_cache_request_key(resource, params)
+            cached_page = await cls.get_cached_page(cache_namespace, request_key)
+            if cached_page is not None:
+                headers["If-None-Match"] = cached_page["etag"]
+        await acquire_rate_limit_async()
+        async with cls.semaphore:
+            response = await cls.client.request(
+                method, resource, params=params, json=body, headers=headers
+            )
+        await record_quota_usage_async(method)
+        if response.status_code == 304 and cached_page is not None:
+            return cached_page["body"]
+        if response.status_code >= 400:
+            raise HttpError(
+                httplib2.Response({"status": response.status_code}),
+                response.content,
+                uri=str(response.url),
+            )
+        if response.status_code == 204 or not response.content:
+            return {}
+        result = response.json()
+        etag = response.headers.get("ETag") or result.get("etag")
+        if cache_namespace is not None and etag:
+            await cls.store_cached_page(cache_namespace, request_key, etag, result)
+        return result
+
+    @classmethod
+    async def get_cached_page(
+        cls, cache_namespace: str, request_key: str
+    ) -> Optional[dict]:
+        try:
+            return await async_redis_db.get_cached_list_page(
+                cache_namespace, request_key
+            )
+        except RedisError:
+            logger.exception("Failed to read cached YouTube list page")
+            return None
+
+    @classmethod
+    async def store_cached_page(
+        cls, cache_namespace: str, request_key: str, etag: str, body: dict
+    ) -> None:
+        try:
+            await async_redis_db.store_cached_list_page(
+                cache_namespace, request_key, etag, body
+            )
+        except RedisError:
+            logger.exception("Failed to cache YouTube list page")
+
+    @classmethod
+    async def list_subscriptions(
+        cls, credentials, cache_namespace: Optional[str] = None, **params
+    ) -> dict:
+        return await cls.request(
+            credentials, "GET", "subscriptions", params, cache_namespace=cache_namespace
+        )
+
+    @classmethod
+    async def insert_subscription(
+        cls, credentials, body: dict, part: str = "snippet"
+    ) -> dict:
+        return await cls.request(
+            credentials, "POST", "subscriptions", {"part": part}, body
+        )
+
+    @classmethod
+    async def delete_subscription(cls, credentials, subscription_id: str) -> dict:
+        return await cls.request(
+            credentials, "DELETE", "subscriptions", {"id": subscription_id}
+        )
+
+    @classmethod
+    async def list_playlists(
+        cls, credentials, cache_namespace: Optional[str] = None, **params
+    ) -> dict:
+        return await cls.request(
+            credentials, "GET", "playlists", params, cache_namespace=cache_namespace
+        )
+
+    @classmethod
+    async def insert_playlist(
+        cls, credentials, body: dict, part: str = "id,snippet,status"
+    ) -> dict:
+        return await cls.request(credentials, "POST", "playlists", {"part": part}, body)
+
+    @classmethod
+    async def list_playlist_items(
+        cls, credentials, cache_namespace: Optional[str] = None, **params
+    ) -> dict:
+        return await cls.request(
+            credentials, "GET", "playlistItems", params, cache_namespace=cache_namespace
+        )
+
+    @classmethod
+    async def insert_playlist_item(
+        cls, credentials, body: dict, part: str = "snippet,contentDetails,id"
+    ) -> dict:
+        return await cls.request(
+            credentials, "POST", "playlistItems", {"part": part}, body
+        )
+
+
+youtube_client = AsyncYouTubeClient()
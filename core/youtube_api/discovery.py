@@ -0,0 +1,31 @@
+"""
+This file caches the YouTube discovery document for the lifetime of the process. The document is read from the copy
+bundled with `googleapiclient` (no network call) and parsed once, authenticated service objects are then built from it.
+"""
+import json
+from functools import lru_cache
+
+import google.oauth2.credentials
+from googleapiclient.discovery import build_from_document, Resource
+from googleapiclient.discovery_cache import get_static_doc
+
+
+YOUTUBE_API_SERVICE = "youtube"
+API_VERSION = "v3"
+
+
+@lru_cache(maxsize=None)
+def get_discovery_document(
+    service_name: str = YOUTUBE_API_SERVICE, version: str = API_VERSION
+) -> dict:
+    """Loads and parses the bundled discovery document once per process."""
+    document = get_static_doc(service_name, version)
+    assert document, f"No bundled discovery document for {service_name} {version}"
+    return json.loads(document)
+
+
+def build_youtube_service(
+    credentials: google.oauth2.credentials.Credentials,
+) -> Resource:
+    """Builds an authenticated YouTube service object from the cached discovery document."""
+    return build_from_document(get_discovery_document(), credentials=credentials)
@@ -0,0 +1,37 @@
+"""
+This file defines the partial-response `fields` masks of every YouTube call. Each mask lists only the attributes the
+call site (or the template it renders) reads, so response bodies and JSON parsing shrink.
+"""
+
+# core/templates/subscriptions.html
+SUBSCRIPTIONS_PAGE_FIELDS = (
+    "etag,nextPageToken,items(id,snippet(title,description,resourceId/channelId))"
+)
+
+# core.utilities.get_subscribed_channel_ids
+SUBSCRIBED_CHANNEL_IDS_FIELDS = "nextPageToken,items/snippet/resourceId/channelId"
+
+# core/templates/playlists.html
+PLAYLISTS_PAGE_FIELDS = (
+    "etag,nextPageToken,items(id,"
+    "snippet(title,description,defaultLanguage,thumbnails/default/url),"
+    "status/privacyStatus,contentDetails/itemCount)"
+)
+
+# core.utilities.make_playlist_item_model
+PLAYLIST_ITEMS_FIELDS = (
+    "etag,nextPageToken,items(snippet(title,position,resourceId(kind,videoId)),"
+    "contentDetails/note)"
+)
+
+# core.utilities.match_destination_playlist
+PLAYLIST_TITLES_FIELDS = "nextPageToken,items(id,snippet/title)"
+
+# core.utilities.destination_playlist_exists
+PLAYLIST_IDS_FIELDS = "items/id"
+
+# core.utilities.get_playlist_video_ids
+PLAYLIST_VIDEO_IDS_FIELDS = "nextPageToken,items/snippet/resourceId/videoId"
+
+# Inserts and their callers only need the id of the created resource.
+INSERTED_RESOURCE_FIELDS = "id"
@@ -0,0 +1,49 @@
+"""
+This file defines one paginator for every YouTube `list` call. Pages are yielded as soon as they arrive so callers
+can consume them incrementally instead of accumulating every page in memory.
+"""
+from typing import AsyncIterator, Callable, Optional
+
+GOOGLE_API_MAX_RESULTS = 50
+
+
+async def paginate(
+    list_method: Callable,
+    credentials,
+    part: str,
+    fields: Optional[str] = None,
+    max_results: int = GOOGLE_API_MAX_RESULTS,
+    **params,
+) -> AsyncIterator[dict]:
+    """Yields every page of a `list` call, e.g. `paginate(youtube_client.list_playlists, credentials, "snippet", mine=True)`.
+    Every page is requested with the same `part` and `fields`."""
+    page_token = None
+    while True:
+        page: dict = await list_method(
+            credentials,
+            part=part,
+            fields=fields,
+            maxResults=max_results,
+            pageToken=page_token,
+            **params,
+        )
+        yield page
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            break
+
+
+async def paginate_items(
+    list_method: Callable,
+    credentials,
+    part: str,
+    fields: Optional[str] = None,
+    max_results: int = GOOGLE_API_MAX_RESULTS,
+    **params,
+) -> AsyncIterator[dict]:
+    """Yields the resources of every page of a `list` call one at a time."""
+    async for page in paginate(
+        list_method, credentials, part, fields, max_results, **params
+    ):
+        for item in page.get("items", []):
+            yield item
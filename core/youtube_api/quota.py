@@ -0,0 +1,120 @@
+"""
+This file accounts the YouTube Data API quota units spent by the app. Usage is recorded in Redis per day (the quota
+resets at midnight Pacific time), per user and per minute, which gives the burn rate and remaining daily budget.
+"""
+import os
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+import pytz
+from dotenv import load_dotenv
+from redis.exceptions import RedisError
+
+from core.logs.logger_config import logger
+from core.redis_storage.async_redis_db import async_redis_db
+from core.redis_storage.redis_db import redis_db
+
+
+load_dotenv()
+
+YOUTUBE_DAILY_QUOTA = int(os.environ.get("YOUTUBE_DAILY_QUOTA", 10_000))
+QUOTA_TIMEZONE = pytz.timezone("America/Los_Angeles")
+BURN_RATE_WINDOW_MINUTES = 5
+# Units charged by the YouTube Data API per call, by HTTP method.
+QUOTA_COST_BY_METHOD = {"GET": 1, "POST": 50, "PUT": 50, "DELETE": 50}
+ANONYMOUS_QUOTA_USER = "anonymous"
+
+# The user the current request or task spends quota on behalf of.
+quota_user: ContextVar[str] = ContextVar("quota_user", default=ANONYMOUS_QUOTA_USER)
+
+
+def set_quota_user(user: Optional[str]) -> None:
+    quota_user.set(user or ANONYMOUS_QUOTA_USER)
+
+
+def get_quota_day() -> str:
+    return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+
+def get_quota_cost(method: str, calls: int = 1) -> int:
+    return QUOTA_COST_BY_METHOD.get(method.upper(), 1) * calls
+
+
+def record_quota_usage(method: str, calls: int = 1) -> None:
+    """Charges `calls` API calls of `method` to the current quota user. Never fails the API call itself."""
+    try:
+        redis_db.record_quota_usage(
+            get_quota_day(),
+            int(time.time() // 60),
+            quota_user.get(),
+            get_quota_cost(method, calls),
+        )
+    except RedisError:
+        logger.exception("Failed to record YouTube quota usage")
+
+
+async def record_quota_usage_async(method: str, calls: int = 1) -> None:
+    """`record_quota_usage()` for the event loop."""
+    try:
+        await async_redis_db.record_quota_usage(
+            get_quota_day(),
+            int(time.time() // 60),
+            quota_user.get(),
+            get_quota_cost(method, calls),
+        )
+    except RedisError:
+        logger.exception("Failed to record YouTube quota usage")
+
+
+def get_burn_rate_minutes() -> range:
+    current_minute = int(time.time() // 60)
+    return range(current_minute - BURN_RATE_WINDOW_MINUTES + 1, current_minute + 1)
+
+
+def get_quota_status(user: Optional[str] = None) -> dict:
+    """Summarises today's quota consumption, the burn rate in units per minute and the remaining budget."""
+    day = get_quota_day()
+    usage = redis_db.get_quota_usage(
+        day, user or quota_user.get(), get_burn_rate_minutes()
+    )
+    return make_quota_status(day, *usage)
+
+
+async def get_quota_status_async(user: Optional[str] = None) -> dict:
+    """`get_quota_status()` for the event loop."""
+    day = get_quota_day()
+    usage = await async_redis_db.get_quota_usage(
+        day, user or quota_user.get(), get_burn_rate_minutes()
+    )
+    return make_quota_status(day, *usage)
+
+
+def make_quota_status(day: str, used: int, user_used: int, minute_usage: list) -> dict:
+    return {
+        "day": day,
+        "daily_budget": YOUTUBE_DAILY_QUOTA,
+        "used": used,
+        "user_used": user_used,
+        "remaining": max(YOUTUBE_DAILY_QUOTA - used, 0),
+        "burn_rate_per_minute": sum(minute_usage) / BURN_RATE_WINDOW_MINUTES,
+    }
+
+
+def has_quota_for(units: int) -> bool:
+    """Whether `units` can still be spent today. Assumes there is budget when the ledger is unavailable."""
+    try:
+        return get_quota_status()["remaining"] >= units
+    except RedisError:
+        logger.exception("Failed to read YouTube quota usage")
+        return True
+
+
+async def has_quota_for_async(units: int) -> bool:
+    """`has_quota_for()` for the event loop."""
+    try:
+        return (await get_quota_status_async())["remaining"] >= units
+    except RedisError:
+        logger.exception("Failed to read YouTube quota usage")
+        return True
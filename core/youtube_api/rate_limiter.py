@@ -0,0 +1,69 @@
+"""
+This file throttles every YouTube API call made by web and Celery workers through Redis token buckets: one bucket shared
+by the whole app and one per quota user. Calls wait for tokens instead of bursting into `rateLimitExceeded` errors.
+"""
+import asyncio
+import os
+import time
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+from redis.exceptions import RedisError
+
+from core.logs.logger_config import logger
+from core.redis_storage.async_redis_db import async_redis_db
+from core.redis_storage.redis_db import redis_db
+from core.youtube_api.quota import quota_user
+
+
+load_dotenv()
+
+# Requests per second and burst size of the app-wide and the per-user buckets.
+GAPI_GLOBAL_RATE = float(os.environ.get("GAPI_GLOBAL_RATE", 40))
+GAPI_GLOBAL_BURST = float(os.environ.get("GAPI_GLOBAL_BURST", 80))
+GAPI_USER_RATE = float(os.environ.get("GAPI_USER_RATE", 10))
+GAPI_USER_BURST = float(os.environ.get("GAPI_USER_BURST", 20))
+
+
+def get_rate_limit_buckets() -> List[Tuple[str, float, float]]:
+    return [
+        ("global", GAPI_GLOBAL_RATE, GAPI_GLOBAL_BURST),
+        (f"user:{quota_user.get()}", GAPI_USER_RATE, GAPI_USER_BURST),
+    ]
+
+
+def get_rate_limit_wait(calls: int) -> float:
+    """Seconds to wait before `calls` may be made, 0 once the tokens were taken. Never throttles when Redis is down."""
+    try:
+        return redis_db.take_rate_limit_tokens(get_rate_limit_buckets(), calls) / 1000
+    except RedisError:
+        logger.exception("Failed to take YouTube rate limit tokens")
+        return 0
+
+
+def acquire_rate_limit(calls: int = 1) -> None:
+    """Blocks until `calls` YouTube API calls may be made."""
+    wait = get_rate_limit_wait(calls)
+    while wait > 0:
+        time.sleep(wait)
+        wait = get_rate_limit_wait(calls)
+
+
+async def get_rate_limit_wait_async(calls: int) -> float:
+    """`get_rate_limit_wait()` for the event loop."""
+    try:
+        return (
+            await async_redis_db.take_rate_limit_tokens(get_rate_limit_buckets(), calls)
+            / 1000
+        )
+    except RedisError:
+        logger.exception("Failed to take YouTube rate limit tokens")
+        return 0
+
+
+async def acquire_rate_limit_async(calls: int = 1) -> None:
+    """Waits, without blocking the event loop, until `calls` YouTube API calls may be made."""
+    wait = await get_rate_limit_wait_async(calls)
+    while wait > 0:
+        await asyncio.sleep(wait)
+        wait = await get_rate_limit_wait_async(calls)
@@ -1,8 +1,11 @@
 import threading
-from typing import Optional, Any, Dict, List
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from typing import Optional, Any, Dict, Iterator, List
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy.orm import sessionmaker, Session, noload
+from sqlalchemy import create_engine, delete, event, insert
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
 from database.memory_db_models import Base
 from dotenv import load_dotenv
 import os
@@ -16,6 +19,29 @@ from core import models
 
 load_dotenv()
 
+MEM_DB_POOL_SIZE = int(os.environ.get("MEM_DB_POOL_SIZE", 5))
+MEM_DB_MAX_OVERFLOW = int(os.environ.get("MEM_DB_MAX_OVERFLOW", 10))
+MEM_DB_POOL_TIMEOUT = int(os.environ.get("MEM_DB_POOL_TIMEOUT", 30))
+MEM_DB_POOL_RECYCLE = int(os.environ.get("MEM_DB_POOL_RECYCLE", 1800))
+# Milliseconds a SQLite writer waits for the database lock before failing with "database is locked".
+MEM_DB_SQLITE_BUSY_TIMEOUT = int(os.environ.get("MEM_DB_SQLITE_BUSY_TIMEOUT", 5000))
+
+# Session of the `MemDB.unit_of_work` block running in the current thread or task.
+current_session: ContextVar[Optional[Session]] = ContextVar(
+    "mem_db_session", default=None
+)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Lets SQLite readers run alongside a writer (WAL) and makes writers wait on the lock instead of failing"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={MEM_DB_SQLITE_BUSY_TIMEOUT}")
+    finally:
+        cursor.close()
+
 
 class ThreadSafeSingleton(type):
     _instances = {}
@@ -42,9 +68,40 @@ class MemDB(metaclass=ThreadSafeSingleton):
     def setup(cls, sql_echo=False) -> None:
         MEM_DB_ENGINE = os.environ.get("MEM_DB_URI")
         assert MEM_DB_ENGINE, "MEM_DB_URI is not set"
-        cls.engine = create_engine(MEM_DB_ENGINE, echo=sql_echo)
+        cls.engine = create_engine(
+            MEM_DB_ENGINE, echo=sql_echo, **cls.get_engine_options(MEM_DB_ENGINE)
+        )
+        if cls.engine.dialect.name == "sqlite":
+            event.listen(cls.engine, "connect", set_sqlite_pragmas)
         cls.session = sessionmaker(bind=cls.engine)
         Base.metadata.create_all(bind=cls.engine)
+        # `create_all` skips existing tables, indexes added to the models since are created here.
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=cls.engine, checkfirst=True)
+
+    @staticmethod
+    def get_engine_options(uri: str) -> Dict[str, Any]:
+        """Pool settings for `create_engine`, sized from the `MEM_DB_POOL_*` environment variables.
+        An in-memory SQLite database lives inside its one connection, so it keeps SQLAlchemy's default pool."""
+        url = make_url(uri)
+        if url.get_backend_name() == "sqlite":
+            if url.database in (None, "", ":memory:"):
+                return {}
+            options: Dict[str, Any] = {
+                "poolclass": QueuePool,
+                # Pooled connections are handed between web and Celery threads.
+                "connect_args": {"check_same_thread": False},
+            }
+        else:
+            options = {"pool_pre_ping": True}
+        options.update(
+            pool_size=MEM_DB_POOL_SIZE,
+            max_overflow=MEM_DB_MAX_OVERFLOW,
+            pool_timeout=MEM_DB_POOL_TIMEOUT,
+            pool_recycle=MEM_DB_POOL_RECYCLE,
+        )
+        return options
 
     @classmethod
     def get_session(cls) -> Session:
@@ -52,49 +109,116 @@ class MemDB(metaclass=ThreadSafeSingleton):
         assert cls.session, f"Please run {cls}.setup()"
         return cls.session()
 
+    @classmethod
+    @contextmanager
+    def unit_of_work(cls) -> Iterator[Session]:
+        """Shares one session (and transaction) across every MemDB call made inside the block, e.g.
+        `with mem_db.unit_of_work(): mem_db.upsert_playlists(...); mem_db.upsert_playlist_items(...)`.
+        Writes are committed together when the block exits and rolled back if it raises. Nested blocks
+        join the outermost one."""
+        session = current_session.get()
+        if session is not None:
+            yield session
+            return
+        session = cls.get_session()
+        token = current_session.set(session)
+        try:
+            yield session
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        finally:
+            current_session.reset(token)
+            session.close()
+
+    @classmethod
+    @contextmanager
+    def session_scope(cls) -> Iterator[Session]:
+        """The session of the enclosing `unit_of_work`, or a new session closed on exit"""
+        session = current_session.get()
+        if session is not None:
+            yield session
+            return
+        session = cls.get_session()
+        with session:
+            yield session
+
+    @staticmethod
+    def commit(session: Session) -> None:
+        """Commits `session`, or only flushes it when it belongs to a `unit_of_work` which commits on exit"""
+        if session is current_session.get():
+            session.flush()
+        else:
+            session.commit()
+
+    @staticmethod
+    def rollback(session: Session) -> None:
+        """Rolls back a failed write. Inside a `unit_of_work` the error is re-raised, so the whole unit is rolled
+        back rather than committing the writes around the failed one."""
+        session.rollback()
+        if session is current_session.get():
+            raise
+
     @classmethod
     def get_engine(cls) -> Engine:
         return cls.engine
 
+    @classmethod
+    @contextmanager
+    def count_queries(cls) -> Iterator[List[str]]:
+        """Records every SQL statement the engine executes inside the block, e.g.
+        `with mem_db.count_queries() as statements: ...` then `len(statements)`."""
+        statements: List[str] = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(cls.engine, "before_cursor_execute", record_statement)
+        try:
+            yield statements
+        finally:
+            event.remove(cls.engine, "before_cursor_execute", record_statement)
+
     @classmethod
     def get_owner(cls, user_id: str) -> Optional[models.Owner]:
-        session: Session = cls.get_session()
-        with session:
+        with cls.session_scope() as session:
             return session.query(orm.Owner).filter_by(user_id=user_id).first()
 
     @classmethod
     def store_owner(cls, user_id: str) -> models.Owner:
         """Adds user to `owner`'s table"""
-        session: Session = cls.get_session()
-        user = cls.get_owner(user_id)
-        if user:
+        with cls.session_scope() as session:
+            user = session.query(orm.Owner).filter_by(user_id=user_id).first()
+            if user:
+                return models.Owner.from_orm(user)
+            try:
+                user = orm.Owner(
+                    user_id=user_id, created_at=datetime.now().astimezone().isoformat()
+                )
+                session.add(user)
+                cls.commit(session)
+            except Exception as E:
+                logger.exception(
+                    "Attempted creating a new `Owner`", {"user_id": user_id}
+                )
+                # raise HTTPException(
+                #     500,
+                #     detail={
+                #         "msg": "Encountered an Error while processing your request, please restart the process.1"
+                #     },
+                # )
+                cls.rollback(session)
+                user = session.query(orm.Owner).filter_by(user_id=user_id).first()
             return models.Owner.from_orm(user)
-        try:
-            user = orm.Owner(
-                user_id=user_id, created_at=datetime.now().astimezone().isoformat()
-            )
-            session.add(user)
-            session.commit()
-        except Exception as E:
-            logger.exception("Attempted creating a new `Owner`", {"user_id": user_id})
-            # raise HTTPException(
-            #     500,
-            #     detail={
-            #         "msg": "Encountered an Error while processing your request, please restart the process.1"
-            #     },
-            # )
-        finally:
-            session.close()
-
-        return models.Owner.from_orm(cls.get_owner(user_id))
 
     @classmethod
     def get_playlist(cls, playlist_id: str, user_id: str) -> models.Playlist:
         """Retrieves a single `Playlist` matching the provided `user_id` and `playlist_id`"""
-        session: Session = cls.get_session()
-        with session:
+        with cls.session_scope() as session:
             playlist = (
                 session.query(orm.Playlist)
+                .options(noload(orm.Playlist.playlist_items))
                 .filter_by(playlist_id=playlist_id, user_id=user_id)
                 .first()
             )
@@ -103,61 +227,64 @@ class MemDB(metaclass=ThreadSafeSingleton):
     @classmethod
     def get_playlists(cls, user_id: str) -> List[models.Playlist]:
         """Retrieves all `Playlist` matching the provided `user_id`"""
-        session: Session = cls.get_session()
-        with session:
-            _ = session.query(orm.Playlist).filter_by(user_id=user_id).all()
+        with cls.session_scope() as session:
+            _ = (
+                session.query(orm.Playlist)
+                .options(noload(orm.Playlist.playlist_items))
+                .filter_by(user_id=user_id)
+                .all()
+            )
             playlists = [models.Playlist.from_orm(i) for i in _]
             return playlists
 
     @classmethod
     def store_playlist(cls, playlist_model: models.Playlist) -> None:
         """Stores a single playlist into `MemDB`"""
-        session: Session = cls.get_session()
-        try:
-            session.add(orm.Playlist(**playlist_model.dict(exclude_none=True)))
-            session.commit()
-        except:
-            logger.exception(
-                "Attempted storing Playlist", {"playlist_model": playlist_model}
-            )
-            # raise HTTPException(
-            #     500,
-            #     detail={
-            #         "msg": "Encountered an Error while processing your request, please restart the process.2"
-            #     },
-            # )
-        finally:
-            session.close()
+        with cls.session_scope() as session:
+            try:
+                session.add(orm.Playlist(**playlist_model.dict(exclude_none=True)))
+                cls.commit(session)
+            except:
+                logger.exception(
+                    "Attempted storing Playlist", {"playlist_model": playlist_model}
+                )
+                # raise HTTPException(
+                #     500,
+                #     detail={
+                #         "msg": "Encountered an Error while processing your request, please restart the process.2"
+                #     },
+                # )
+                cls.rollback(session)
 
     @classmethod
     def store_playlists(cls, playlist_models: List[models.Playlist]) -> None:
         """Stores multiple playlists into DB"""
 
-        session: Session = cls.get_session()
-        try:
-            model = [orm.Playlist(**i.dict(exclude_none=True)) for i in playlist_models]
-            session.add_all(model)
-            session.commit()
-        except:
-            logger.exception(
-                "Attempted storing Playlists", {"playlist_models": playlist_models}
-            )
-            # raise HTTPException(
-            #     500,
-            #     detail={
-            #         "msg": "Encountered an Error while processing your request, please restart the process.3"
-            #     },
-            # )
-        finally:
-            session.close()
+        with cls.session_scope() as session:
+            try:
+                model = [
+                    orm.Playlist(**i.dict(exclude_none=True)) for i in playlist_models
+                ]
+                session.add_all(model)
+                cls.commit(session)
+            except:
+                logger.exception(
+                    "Attempted storing Playlists", {"playlist_models": playlist_models}
+                )
+                # raise HTTPException(
+                #     500,
+                #     detail={
+                #         "msg": "Encountered an Error while processing your request, please restart the process.3"
+                #     },
+                # )
+                cls.rollback(session)
 
     @classmethod
     def get_playlist_item(
         cls, playlist_id: str, resource_id: str
     ) -> models.PlaylistItem:
         """Retrieves a playlist-item from MemDB"""
-        session = cls.get_session()
-        with session:
+        with cls.session_scope() as session:
             playlist_item = (
                 session.query(orm.PlaylistItem)
                 .filter_by(playlist_id=playlist_id, resource_id=resource_id)
@@ -168,56 +295,208 @@ class MemDB(metaclass=ThreadSafeSingleton):
     @classmethod
     def get_playlist_items(cls, user_id: str) -> List[models.PlaylistItem]:
         """Retrieves multiple playlists that match the given `user_id`"""
-        session = cls.get_session()
-        with session:
+        with cls.session_scope() as session:
             _ = session.query(orm.PlaylistItem).filter_by(user_id=user_id).all()
             result = [models.PlaylistItem.from_orm(i) for i in _]
             return result
 
+    @classmethod
+    def iter_playlist_items(
+        cls, user_id: str, playlist_id: str, page_size: int = 500
+    ) -> Iterator[List[models.PlaylistItem]]:
+        """Yields the playlist-items of a single playlist in pages of `page_size`.
+        Pages are fetched by keyset (`id > last id`) so every page is an index range scan, not an `OFFSET`."""
+        last_id = 0
+        while True:
+            with cls.session_scope() as session:
+                _ = (
+                    session.query(orm.PlaylistItem)
+                    .filter(
+                        orm.PlaylistItem.user_id == user_id,
+                        orm.PlaylistItem.originating_playlist_id == playlist_id,
+                        orm.PlaylistItem.id > last_id,
+                    )
+                    .order_by(orm.PlaylistItem.id)
+                    .limit(page_size)
+                    .all()
+                )
+                page = [models.PlaylistItem.from_orm(i) for i in _]
+            if not page:
+                return
+            yield page
+            last_id = page[-1].id
+
+    @classmethod
+    def count_playlist_items(cls, user_id: str) -> int:
+        """Counts the playlist-items of `user_id` without loading them"""
+        with cls.session_scope() as session:
+            return session.query(orm.PlaylistItem).filter_by(user_id=user_id).count()
+
     @classmethod
     def store_playlist_item(cls, playlist_item: models.PlaylistItem) -> None:
         """Stores a single playlist item in MemDB"""
-        session = cls.get_session()
-        try:
-            session.add(orm.PlaylistItem(**playlist_item.dict()))
-            session.commit()
-        except:
-            logger.exception(
-                "Attempted to store playlist-item but failed.",
-                {"playlist-item": playlist_item},
-            )
-            # raise HTTPException(
-            #     500,
-            #     detail={
-            #         "msg": "Encountered an Error while processing your request, please restart the process.4"
-            #     },
-            # )
-        finally:
-            session.close()
+        with cls.session_scope() as session:
+            try:
+                session.add(orm.PlaylistItem(**playlist_item.dict()))
+                cls.commit(session)
+            except:
+                logger.exception(
+                    "Attempted to store playlist-item but failed.",
+                    {"playlist-item": playlist_item},
+                )
+                # raise HTTPException(
+                #     500,
+                #     detail={
+                #         "msg": "Encountered an Error while processing your request, please restart the process.4"
+                #     },
+                # )
+                cls.rollback(session)
 
     @classmethod
     def store_playlist_items(cls, playlist_items: List[models.PlaylistItem]) -> None:
         """Stores multiple playlist-items into `MemDB`"""
-        session = cls.get_session()
-        try:
-            model = [
-                orm.PlaylistItem(**i.dict(exclude_none=True)) for i in playlist_items
-            ]
-            session.add_all(model)
-            session.commit()
-        except:
-            logger.exception(
-                "Attempted to store playlist-items but failed.",
-                {"playlist-item": playlist_items},
-            )
-            # raise HTTPException(
-            #     500,
-            #     detail={
-            #         "msg": "Encountered an Error while processing your request, please restart the process.5"
-            #     },
-            # )
-        finally:
-            session.close()
+        with cls.session_scope() as session:
+            try:
+                model = [
+                    orm.PlaylistItem(**i.dict(exclude_none=True))
+                    for i in playlist_items
+                ]
+                session.add_all(model)
+                cls.commit(session)
+            except:
+                logger.exception(
+                    "Attempted to store playlist-items but failed.",
+                    {"playlist-item": playlist_items},
+                )
+                # raise HTTPException(
+                #     500,
+                #     detail={
+                #         "msg": "Encountered an Error while processing your request, please restart the process.5"
+                #     },
+                # )
+                cls.rollback(session)
+
+    @staticmethod
+    def make_bulk_mappings(table, pydantic_models: List[Any]) -> List[dict]:
+        """Converts models into uniform row mappings for an executemany `INSERT`. Missing values fall back to the
+        column's scalar default, like the ORM path (which leaves `None` fields out) does."""
+        defaults = {
+            column.name: column.default.arg
+            for column in table.columns
+            if column.default is not None and column.default.is_scalar
+        }
+        mappings = []
+        for pydantic_model in pydantic_models:
+            mapping = pydantic_model.dict(exclude={"id"})
+            for name, default in defaults.items():
+                if mapping.get(name) is None:
+                    mapping[name] = default
+            mappings.append(mapping)
+        return mappings
+
+    @classmethod
+    def bulk_store_playlists(cls, playlist_models: List[models.Playlist]) -> None:
+        """Stores multiple playlists with a single executemany `INSERT`, bypassing ORM object construction"""
+        if not playlist_models:
+            return
+        table = orm.Playlist.__table__
+        with cls.session_scope() as session:
+            try:
+                session.execute(
+                    insert(table), cls.make_bulk_mappings(table, playlist_models)
+                )
+                cls.commit(session)
+            except:
+                logger.exception(
+                    "Attempted bulk storing Playlists",
+                    {"playlist_models": playlist_models},
+                )
+                cls.rollback(session)
+
+    @classmethod
+    def bulk_store_playlist_items(
+        cls, playlist_items: List[models.PlaylistItem]
+    ) -> None:
+        """Stores multiple playlist-items with a single executemany `INSERT`, bypassing ORM object construction"""
+        if not playlist_items:
+            return
+        table = orm.PlaylistItem.__table__
+        with cls.session_scope() as session:
+            try:
+                session.execute(
+                    insert(table), cls.make_bulk_mappings(table, playlist_items)
+                )
+                cls.commit(session)
+            except:
+                logger.exception(
+                    "Attempted to bulk store playlist-items but failed.",
+                    {"playlist-item": playlist_items},
+                )
+                cls.rollback(session)
+
+    @classmethod
+    def upsert_playlists(cls, playlist_models: List[models.Playlist]) -> None:
+        """Stores multiple playlists, replacing the stored rows of the same `user_id` and `playlist_id`.
+        The tables have no unique constraint to conflict on, so rows are replaced within one transaction."""
+        if not playlist_models:
+            return
+        table = orm.Playlist.__table__
+        with cls.session_scope() as session:
+            try:
+                for user_id, playlist_ids in cls.group_ids_by_user(
+                    (i.user_id, i.playlist_id) for i in playlist_models
+                ).items():
+                    session.execute(
+                        delete(table).where(
+                            table.c.user_id == user_id,
+                            table.c.playlist_id.in_(playlist_ids),
+                        )
+                    )
+                session.execute(
+                    insert(table), cls.make_bulk_mappings(table, playlist_models)
+                )
+                cls.commit(session)
+            except:
+                logger.exception(
+                    "Attempted upserting Playlists",
+                    {"playlist_models": playlist_models},
+                )
+                cls.rollback(session)
+
+    @classmethod
+    def upsert_playlist_items(cls, playlist_items: List[models.PlaylistItem]) -> None:
+        """Stores multiple playlist-items, replacing the stored items of the same `user_id` and `originating_playlist_id`"""
+        if not playlist_items:
+            return
+        table = orm.PlaylistItem.__table__
+        with cls.session_scope() as session:
+            try:
+                for user_id, playlist_ids in cls.group_ids_by_user(
+                    (i.user_id, i.originating_playlist_id) for i in playlist_items
+                ).items():
+                    session.execute(
+                        delete(table).where(
+                            table.c.user_id == user_id,
+                            table.c.originating_playlist_id.in_(playlist_ids),
+                        )
+                    )
+                session.execute(
+                    insert(table), cls.make_bulk_mappings(table, playlist_items)
+                )
+                cls.commit(session)
+            except:
+                logger.exception(
+                    "Attempted to upsert playlist-items but failed.",
+                    {"playlist-item": playlist_items},
+                )
+                cls.rollback(session)
+
+    @staticmethod
+    def group_ids_by_user(user_and_ids) -> Dict[str, set]:
+        grouped: Dict[str, set] = {}
+        for user_id, resource_id in user_and_ids:
+            grouped.setdefault(user_id, set()).add(resource_id)
+        return grouped
 
     @classmethod
     def update_playlist_item_destination_ids(
@@ -227,30 +506,29 @@ class MemDB(metaclass=ThreadSafeSingleton):
         new_id: str,
     ) -> None:
         """Updates the destination-id field of playlist-item"""
-        session = cls.get_session()
-        try:
-            session.query(orm.PlaylistItem).filter_by(
-                user_id=user_id, originating_playlist_id=old_id
-            ).update({orm.PlaylistItem.destination_playlist_id: new_id})
-            session.commit()
-        except:
-            logger.exception(
-                "Attempted to update destination_id for playlist-item but failed.",
-                {
-                    "playlist-item": old_id,
-                    "user-id": user_id,
-                    "originating-playlist-id": old_id,
-                    "destination-playlist-id": new_id,
-                },
-            )
-            # raise HTTPException(
-            #     500,
-            #     detail={
-            #         "msg": "Encountered an Error while processing your request, please restart the process.6"
-            #     },
-            # )
-        finally:
-            session.close()
+        with cls.session_scope() as session:
+            try:
+                session.query(orm.PlaylistItem).filter_by(
+                    user_id=user_id, originating_playlist_id=old_id
+                ).update({orm.PlaylistItem.destination_playlist_id: new_id})
+                cls.commit(session)
+            except:
+                logger.exception(
+                    "Attempted to update destination_id for playlist-item but failed.",
+                    {
+                        "playlist-item": old_id,
+                        "user-id": user_id,
+                        "originating-playlist-id": old_id,
+                        "destination-playlist-id": new_id,
+                    },
+                )
+                # raise HTTPException(
+                #     500,
+                #     detail={
+                #         "msg": "Encountered an Error while processing your request, please restart the process.6"
+                #     },
+                # )
+                cls.rollback(session)
 
     def __str__(cls) -> str:
         return f"(MemDB) => engine: {cls.get_engine()}"
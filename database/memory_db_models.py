@@ -6,6 +6,7 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Boolean,
+    Index,
 )
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
@@ -27,6 +28,9 @@ class Owner(Base):
 
 class Playlist(Base):
     __tablename__ = "playlists"
+    __table_args__ = (
+        Index("ix_playlists_user_id_playlist_id", "user_id", "playlist_id"),
+    )
     id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
     user_id = Column(String, ForeignKey("owner.user_id", ondelete="CASCADE"))
     playlist_id = Column(String, nullable=False)
@@ -35,8 +39,13 @@ class Playlist(Base):
     privacy_status = Column(String, nullable=False)
     default_lang = Column(String)
     uploaded_at = Column(String, default=datetime.now().astimezone().isoformat())
+    # `playlist_id` is only unique per user, several users may have stored the same playlist.
     playlist_items = relationship(
-        "PlaylistItem", backref="in_same_playlist", lazy="subquery"
+        "PlaylistItem",
+        primaryjoin="and_(Playlist.user_id == foreign(PlaylistItem.user_id), "
+        "Playlist.playlist_id == foreign(PlaylistItem.originating_playlist_id))",
+        backref="in_same_playlist",
+        lazy="select",
     )
 
     def __repr__(self):
@@ -48,6 +57,13 @@ class Playlist(Base):
 
 class PlaylistItem(Base):
     __tablename__ = "playlist_items"
+    __table_args__ = (
+        Index(
+            "ix_playlist_items_user_id_originating_playlist_id",
+            "user_id",
+            "originating_playlist_id",
+        ),
+    )
     id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
     originating_playlist_id = Column(
         String, ForeignKey("playlists.playlist_id", ondelete="CASCADE"), nullable=False
@@ -0,0 +1,70 @@
+"""
+Compares the first page of every YouTube list call made by the app with and without its `fields` mask.
+Reports the response size and JSON parse time of both.
+
+Usage: YOUTUBE_ACCESS_TOKEN=<oauth access token> python -m scripts.benchmark_field_masks [playlist_id]
+"""
+import json
+import os
+import sys
+import time
+
+import httpx
+
+from core.youtube_api.fields import (
+    SUBSCRIPTIONS_PAGE_FIELDS,
+    PLAYLISTS_PAGE_FIELDS,
+    PLAYLIST_ITEMS_FIELDS,
+)
+
+YOUTUBE_API_BASE_URL = "https://www.googleapis.com/youtube/v3/"
+PARSE_ROUNDS = 200
+
+
+def measure(client: httpx.Client, resource: str, params: dict) -> tuple:
+    response = client.get(resource, params=params)
+    response.raise_for_status()
+    started_at = time.perf_counter()
+    for _ in range(PARSE_ROUNDS):
+        json.loads(response.content)
+    parse_time = (time.perf_counter() - started_at) / PARSE_ROUNDS
+    return len(response.content), parse_time
+
+
+def main():
+    token = os.environ["YOUTUBE_ACCESS_TOKEN"]
+    calls = [
+        ("subscriptions", {"part": "snippet", "mine": True}, SUBSCRIPTIONS_PAGE_FIELDS),
+        (
+            "playlists",
+            {"part": "snippet,status,contentDetails", "mine": True},
+            PLAYLISTS_PAGE_FIELDS,
+        ),
+    ]
+    if len(sys.argv) > 1:
+        calls.append(
+            (
+                "playlistItems",
+                {"part": "snippet,contentDetails", "playlistId": sys.argv[1]},
+                PLAYLIST_ITEMS_FIELDS,
+            )
+        )
+    with httpx.Client(
+        base_url=YOUTUBE_API_BASE_URL,
+        headers={"Authorization": f"Bearer {token}"},
+    ) as client:
+        for resource, params, fields in calls:
+            params = {**params, "maxResults": 50}
+            full_size, full_parse = measure(client, resource, params)
+            masked_size, masked_parse = measure(
+                client, resource, {**params, "fields": fields}
+            )
+            print(
+                f"{resource:>14}: {full_size:>8} B -> {masked_size:>8} B "
+                f"({100 * (1 - masked_size / full_size):.0f}% smaller), "
+                f"parse {full_parse * 1e6:.0f} us -> {masked_parse * 1e6:.0f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
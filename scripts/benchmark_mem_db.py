@@ -0,0 +1,62 @@
+"""
+Compares the ORM path of `MemDB.store_playlist_items()` against the bulk and upsert paths.
+
+Usage: python -m scripts.benchmark_mem_db [sizes...]
+Runs against a throwaway SQLite database unless MEM_DB_URI is set.
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault(
+    "MEM_DB_URI", f"sqlite:///{tempfile.mkdtemp()}/benchmark_mem_db.sqlite"
+)
+
+from core import models
+from database.memory_db import mem_db
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def make_playlist_items(user_id: str, count: int):
+    return [
+        models.PlaylistItem(
+            user_id=user_id,
+            title=f"Video {position}",
+            originating_playlist_id=f"PL-{user_id}",
+            position=position,
+            resource_id=f"video-{position}",
+            resource_kind="youtube#video",
+        )
+        for position in range(count)
+    ]
+
+
+def measure(store, playlist_items) -> float:
+    started_at = time.perf_counter()
+    store(playlist_items)
+    return time.perf_counter() - started_at
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        results = []
+        for name, store in (
+            ("store_playlist_items", mem_db.store_playlist_items),
+            ("bulk_store_playlist_items", mem_db.bulk_store_playlist_items),
+            ("upsert_playlist_items", mem_db.upsert_playlist_items),
+        ):
+            playlist_items = make_playlist_items(f"{name}-{size}", size)
+            results.append((name, measure(store, playlist_items)))
+        baseline = results[0][1]
+        for name, elapsed in results:
+            print(
+                f"{size:>7} items  {name:<26} {elapsed:8.3f}s  "
+                f"{size / elapsed:10.0f} items/s  x{baseline / elapsed:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
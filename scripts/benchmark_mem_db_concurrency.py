@@ -0,0 +1,72 @@
+"""
+Measures `MemDB` write throughput with several threads writing at once, as the web app and Celery workers do.
+
+Usage: python -m scripts.benchmark_mem_db_concurrency [threads] [writes_per_thread] [items_per_write]
+Runs against a throwaway SQLite database unless MEM_DB_URI is set. Compare runs with
+MEM_DB_SQLITE_BUSY_TIMEOUT=0 or a smaller MEM_DB_POOL_SIZE to see the effect of the tuning.
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault(
+    "MEM_DB_URI",
+    f"sqlite:///{tempfile.mkdtemp()}/benchmark_mem_db_concurrency.sqlite",
+)
+
+from database.memory_db import mem_db
+from scripts.benchmark_mem_db import make_playlist_items
+
+DEFAULT_THREADS = 8
+DEFAULT_WRITES_PER_THREAD = 20
+DEFAULT_ITEMS_PER_WRITE = 200
+
+
+def write(thread: int, writes: int, items_per_write: int) -> int:
+    """Upserts `writes` playlists' items, each in its own unit of work, returns the number of failed writes"""
+    failed = 0
+    for write_number in range(writes):
+        playlist_items = make_playlist_items(
+            f"thread-{thread}-{write_number}", items_per_write
+        )
+        try:
+            with mem_db.unit_of_work():
+                mem_db.upsert_playlist_items(playlist_items)
+                # A read in the same session, as the request handlers do after writing
+                mem_db.count_playlist_items(playlist_items[0].user_id)
+        except Exception as E:
+            print(f"thread {thread} write {write_number} failed: {E!r}")
+            failed += 1
+    return failed
+
+
+def main():
+    defaults = (DEFAULT_THREADS, DEFAULT_WRITES_PER_THREAD, DEFAULT_ITEMS_PER_WRITE)
+    args = [int(arg) for arg in sys.argv[1:4]]
+    threads, writes, items_per_write = args + list(defaults[len(args) :])
+    print(mem_db, f"pool: {mem_db.get_engine().pool.status()}")
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        failed = sum(
+            executor.map(
+                write,
+                range(threads),
+                [writes] * threads,
+                [items_per_write] * threads,
+            )
+        )
+    elapsed = time.perf_counter() - started_at
+
+    total_items = threads * writes * items_per_write
+    print(
+        f"{threads} threads x {writes} writes x {items_per_write} items  "
+        f"{elapsed:8.3f}s  {total_items / elapsed:10.0f} items/s  "
+        f"{threads * writes / elapsed:8.1f} writes/s  {failed} failed writes"
+    )
+
+
+if __name__ == "__main__":
+    main()
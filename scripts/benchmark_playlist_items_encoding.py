@@ -0,0 +1,72 @@
+"""
+Compares the legacy `json.dumps` encoding of cached playlist-items against the columnar orjson/zlib encoding, by
+stored size and by encode and decode time.
+
+Usage: python -m scripts.benchmark_playlist_items_encoding [sizes...]
+"""
+import json
+import sys
+import time
+
+from core import models
+from core.redis_storage.playlist_items_codec import (
+    decode_playlist_items,
+    encode_playlist_items,
+)
+
+DEFAULT_SIZES = (10, 200, 5_000)
+REPEAT = 20
+
+
+def make_playlist_items(count: int):
+    return [
+        models.PlaylistItem(
+            user_id="2f0f4b5e-5d8c-4f47-a1a5-3c1a8d6f3b20",
+            title=f"Video title number {position} - official music video",
+            originating_playlist_id="PLrAXtmErZgOeiKm4sgNOknGvNjby9efdf",
+            position=position,
+            note=None,
+            resource_id=f"dQw4w9Wg{position:03d}",
+            resource_kind="youtube#video",
+            uploaded_at="2022-12-01T10:00:00Z",
+        )
+        for position in range(count)
+    ]
+
+
+def legacy_encode(playlist_items) -> bytes:
+    return json.dumps([item.dict() for item in playlist_items]).encode("utf-8")
+
+
+def legacy_decode(value: bytes):
+    return [models.PlaylistItem(**item) for item in json.loads(value)]
+
+
+def measure(function, *args) -> float:
+    started_at = time.perf_counter()
+    for _ in range(REPEAT):
+        function(*args)
+    return (time.perf_counter() - started_at) / REPEAT
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        playlist_items = make_playlist_items(size)
+        legacy_value = legacy_encode(playlist_items)
+        value = encode_playlist_items(playlist_items)
+        assert decode_playlist_items(value) == playlist_items
+        for name, encoded, encode, decode in (
+            ("json", legacy_value, legacy_encode, legacy_decode),
+            ("columnar", value, encode_playlist_items, decode_playlist_items),
+        ):
+            print(
+                f"{size:>6} items  {name:<9} {len(encoded):>9} bytes  "
+                f"x{len(legacy_value) / len(encoded):5.1f} smaller  "
+                f"encode {measure(encode, playlist_items) * 1000:8.3f}ms  "
+                f"decode {measure(decode, encoded) * 1000:8.3f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,4 +4,4 @@
 # sleep 5
 
 # Replace * with name of Django Project
-sudo -c "celery -A core.celery_app worker -l FATAL -P solo -f celery.log"
\ No newline at end of file
+sudo -c "celery -A core.celery_app worker -l FATAL -P prefork -c ${CELERY_CONCURRENCY:-4} -f celery.log"
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Guards the number of SQL statements the `MemDB` playlist reads issue, so the playlist-items relationship is never
+loaded along with the playlists again. Runs against an in-memory SQLite database.
+"""
+import os
+
+os.environ["MEM_DB_URI"] = "sqlite://"
+
+import pytest
+
+from core import models
+import database.memory_db_models as orm
+from database.memory_db import mem_db
+
+USER_ID = "query-count-user"
+OTHER_USER_ID = "query-count-other-user"
+PLAYLIST_COUNT = 3
+ITEMS_PER_PLAYLIST = 4
+
+
+def store_playlists(user_id: str, playlist_count: int) -> None:
+    mem_db.store_owner(user_id)
+    mem_db.upsert_playlists(
+        [
+            models.Playlist(
+                user_id=user_id,
+                playlist_id=f"PL-{number}",
+                title=f"Playlist {number}",
+                privacy_status="private",
+            )
+            for number in range(playlist_count)
+        ]
+    )
+    mem_db.upsert_playlist_items(
+        [
+            models.PlaylistItem(
+                user_id=user_id,
+                title=f"Video {position}",
+                originating_playlist_id=f"PL-{number}",
+                position=position,
+                resource_id=f"video-{number}-{position}",
+                resource_kind="youtube#video",
+            )
+            for number in range(playlist_count)
+            for position in range(ITEMS_PER_PLAYLIST)
+        ]
+    )
+
+
+@pytest.fixture(scope="module", autouse=True)
+def stored_playlists():
+    store_playlists(USER_ID, PLAYLIST_COUNT)
+    # Stores the same playlist ids for another user.
+    store_playlists(OTHER_USER_ID, 1)
+
+
+def test_get_playlists_issues_one_query():
+    with mem_db.count_queries() as statements:
+        playlists = mem_db.get_playlists(USER_ID)
+    assert len(playlists) == PLAYLIST_COUNT
+    assert len(statements) == 1
+
+
+def test_get_playlist_issues_one_query():
+    with mem_db.count_queries() as statements:
+        playlist = mem_db.get_playlist("PL-0", USER_ID)
+    assert playlist.title == "Playlist 0"
+    assert len(statements) == 1
+
+
+def test_playlist_items_only_holds_the_items_of_the_same_user():
+    with mem_db.session_scope() as session:
+        playlist = (
+            session.query(orm.Playlist)
+            .filter_by(user_id=USER_ID, playlist_id="PL-0")
+            .one()
+        )
+        assert len(playlist.playlist_items) == ITEMS_PER_PLAYLIST
+        assert {item.user_id for item in playlist.playlist_items} == {USER_ID}
@@ -0,0 +1,67 @@
+"""
+Round-trips the playlist-items cached in Redis through the versioned encoding, and checks that legacy `json.dumps`
+values still decode.
+"""
+import json
+
+import pytest
+
+from core import models
+from core.redis_storage import playlist_items_codec
+from core.redis_storage.playlist_items_codec import (
+    FLAG_ZLIB,
+    FORMAT_VERSION,
+    MAGIC,
+    PlaylistItemsDecodeError,
+    decode_playlist_items,
+    encode_playlist_items,
+)
+
+
+def make_playlist_items(count: int):
+    return [
+        models.PlaylistItem(
+            user_id="codec-user",
+            title=f"Video {position}",
+            originating_playlist_id="PL-codec",
+            position=position,
+            # Every other item has no note, so the column mixes `None` and strings.
+            note=None if position % 2 else f"Note {position}",
+            resource_id=f"video-{position}",
+            resource_kind="youtube#video",
+        )
+        for position in range(count)
+    ]
+
+
+@pytest.mark.parametrize("count", [0, 1, 500])
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip(monkeypatch, count, compress):
+    monkeypatch.setattr(
+        playlist_items_codec,
+        "PLAYLIST_ITEMS_COMPRESS_THRESHOLD",
+        0 if compress else float("inf"),
+    )
+    playlist_items = make_playlist_items(count)
+    value = encode_playlist_items(playlist_items)
+    assert value.startswith(MAGIC)
+    assert value[len(MAGIC)] == FORMAT_VERSION
+    assert bool(value[len(MAGIC) + 1] & FLAG_ZLIB) == compress
+    assert decode_playlist_items(value) == playlist_items
+
+
+def test_decodes_legacy_json():
+    playlist_items = make_playlist_items(3)
+    value = json.dumps([item.dict() for item in playlist_items]).encode("utf-8")
+    assert decode_playlist_items(value) == playlist_items
+
+
+def test_decodes_missing_value():
+    assert decode_playlist_items(None) == []
+
+
+def test_unknown_version_raises():
+    value = encode_playlist_items(make_playlist_items(2))
+    value = MAGIC + bytes((FORMAT_VERSION + 1,)) + value[len(MAGIC) + 1 :]
+    with pytest.raises(PlaylistItemsDecodeError):
+        decode_playlist_items(value)